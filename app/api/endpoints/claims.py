@@ -1,58 +1,341 @@
+import asyncio
+import csv
+import io
+import json
 import uuid
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.deps import get_current_user
+from app.core.responses import APIJSONResponse
 from app.db.base import get_db
+from app.db.routing import read_session, run_read
 from app.models.user import User
-from app.schemas.claim import ClaimCreate, ClaimInDB, ClaimStatusResponse, ClaimUpdate
+from app.schemas.claim import (
+    ClaimBatchCreate,
+    ClaimBatchResponse,
+    ClaimCreate,
+    ClaimInDB,
+    ClaimPage,
+    ClaimStatusResponse,
+    ClaimSummaryResponse,
+    ClaimUpdate,
+    dump_claim,
+    dump_claim_json,
+    dump_claim_status,
+)
 from app.services.claim import (
+    DuplicateClaim,
+    InvalidClaim,
     create_claim,
+    create_claims_batch,
     delete_claim,
     get_claim,
     get_claim_status,
+    get_user_claims,
+    stream_user_claims,
     update_claim,
 )
+from app.services.claim_events import claim_status_hub
+from app.services.claim_summary import get_claim_summary
+from app.services.idempotency import (
+    IdempotencyKeyMismatch,
+    execute_idempotent,
+    request_fingerprint,
+)
 
 router = APIRouter()
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+CSV_COLUMNS = list(ClaimInDB.model_fields)
+
+NDJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE
+
+
+async def _export_claims(
+    user_id: uuid.UUID, fmt: ExportFormat
+) -> AsyncIterator[Union[str, bytes]]:
+    # The export owns its session so the server-side cursor stays open for as
+    # long as the response body is being streamed.
+    async with read_session(user_id) as db:
+        if fmt == ExportFormat.CSV:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            yield buffer.getvalue()
+
+        async for claims in stream_user_claims(
+            db, user_id, settings.CLAIM_EXPORT_CHUNK_SIZE
+        ):
+            if fmt == ExportFormat.NDJSON:
+                yield b"".join(
+                    orjson.dumps(dump_claim(claim), option=NDJSON_OPTIONS)
+                    for claim in claims
+                )
+            else:
+                buffer.seek(0)
+                buffer.truncate()
+                for claim in claims:
+                    row = dump_claim_json(claim)
+                    row["procedures"] = json.dumps(row["procedures"])
+                    writer.writerow(row)
+                yield buffer.getvalue()
+
+
+async def _status_events(user_id: uuid.UUID) -> AsyncIterator[str]:
+    queue = claim_status_hub.subscribe(user_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), settings.SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: status\ndata: {json.dumps(event)}\n\n"
+    finally:
+        claim_status_hub.unsubscribe(user_id, queue)
+
+
+def _claim_etag(claim_id: uuid.UUID, updated_at: datetime) -> str:
+    return f'W/"{claim_id.hex}-{int(updated_at.timestamp() * 1_000_000)}"'
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    return "*" in candidates or etag.removeprefix("W/") in (
+        tag.removeprefix("W/") for tag in candidates
+    )
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def _cached_response(content: dict, etag: str) -> APIJSONResponse:
+    return APIJSONResponse(
+        content, headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
 @router.post("/claims", response_model=ClaimInDB, status_code=status.HTTP_201_CREATED)
 async def submit_claim(
     claim_in: ClaimCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await create_claim(db, claim_in, current_user.id)
+    if idempotency_key is None:
+        try:
+            claim = await create_claim(db, claim_in, current_user.id)
+        except InvalidClaim as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+            )
+        except DuplicateClaim as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        return APIJSONResponse(dump_claim(claim), status_code=status.HTTP_201_CREATED)
+
+    async def operation(session: AsyncSession):
+        claim = await create_claim(session, claim_in, current_user.id, commit=False)
+        return dump_claim_json(claim)
+
+    try:
+        status_code, body, replayed = await execute_idempotent(
+            db,
+            current_user.id,
+            idempotency_key,
+            request_fingerprint(claim_in),
+            operation,
+            status.HTTP_201_CREATED,
+        )
+    except (IdempotencyKeyMismatch, InvalidClaim) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    except DuplicateClaim as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return APIJSONResponse(
+        status_code=status_code,
+        content=body,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
 
 
-@router.get("/claims/{claim_id}", response_model=ClaimInDB)
+@router.get("/claims", response_model=ClaimPage)
+async def list_claims(
+    limit: int = Query(
+        settings.CLAIM_PAGE_DEFAULT_SIZE, ge=1, le=settings.CLAIM_PAGE_MAX_SIZE
+    ),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        claims, next_cursor = await run_read(
+            current_user.id, get_user_claims, current_user.id, limit, cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return APIJSONResponse(
+        {"items": [dump_claim(claim) for claim in claims], "next_cursor": next_cursor}
+    )
+
+
+@router.get("/claims/export")
+async def export_claims(
+    format: ExportFormat = ExportFormat.NDJSON,
+    current_user: User = Depends(get_current_user),
+):
+    return StreamingResponse(
+        _export_claims(current_user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="claims.{format.value}"'
+        },
+    )
+
+
+@router.post(
+    "/claims/batch",
+    response_model=ClaimBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def submit_claims_batch(
+    batch_in: ClaimBatchCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if len(batch_in.claims) > settings.CLAIM_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds maximum size of {settings.CLAIM_BATCH_MAX_SIZE}",
+        )
+
+    results = await create_claims_batch(
+        db, batch_in.claims, current_user.id, atomic=batch_in.atomic
+    )
+    succeeded = sum(1 for result in results if result["success"])
+
+    # Nothing was written: either every item failed or an atomic batch was
+    # rolled back because one did.
+    if succeeded == 0 or (batch_in.atomic and succeeded < len(results)):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[result for result in results if not result["success"]],
+        )
+    if succeeded < len(results):
+        response.status_code = status.HTTP_207_MULTI_STATUS
+
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+@router.get("/claims/summary", response_model=ClaimSummaryResponse)
+async def fetch_claim_summary(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    provider_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    buckets = await run_read(
+        current_user.id,
+        get_claim_summary,
+        current_user.id,
+        date_from,
+        date_to,
+        provider_id,
+    )
+    return {
+        "buckets": buckets,
+        "claim_count": sum(bucket.claim_count for bucket in buckets),
+        "total_amount": sum(bucket.total_amount for bucket in buckets),
+    }
+
+
+@router.get(
+    "/claims/{claim_id}",
+    response_model=ClaimInDB,
+    responses={304: {"description": "Claim has not changed"}},
+)
 async def fetch_claim(
     claim_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
 ):
-    claim = await get_claim(db, claim_id, current_user.id)
+    claim = await run_read(current_user.id, get_claim, claim_id, current_user.id)
     if not claim:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Claim not found"
         )
-    return claim
 
+    etag = _claim_etag(claim.id, claim.updated_at)
+    if _etag_matches(etag, if_none_match):
+        return _not_modified(etag)
+    return _cached_response(dump_claim(claim), etag)
 
-@router.get("/claims/status/{claim_id}", response_model=ClaimStatusResponse)
+
+@router.get("/claims/status/stream")
+async def stream_claim_status(current_user: User = Depends(get_current_user)):
+    return StreamingResponse(
+        _status_events(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/claims/status/{claim_id}",
+    response_model=ClaimStatusResponse,
+    responses={304: {"description": "Claim status has not changed"}},
+)
 async def fetch_claim_status(
     claim_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
 ):
-    claim = await get_claim_status(db, claim_id, current_user.id)
+    claim = await run_read(current_user.id, get_claim_status, claim_id, current_user.id)
     if not claim:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Claim not found"
         )
-    return claim
+
+    etag = _claim_etag(claim.id, claim.updated_at)
+    if _etag_matches(etag, if_none_match):
+        return _not_modified(etag)
+    return _cached_response(dump_claim_status(claim), etag)
 
 
 @router.put("/claims/{claim_id}", response_model=ClaimInDB)
@@ -62,12 +345,17 @@ async def update_claim_endpoint(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    updated_claim = await update_claim(db, claim_id, claim_in, current_user.id)
+    try:
+        updated_claim = await update_claim(db, claim_id, claim_in, current_user.id)
+    except InvalidClaim as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
     if not updated_claim:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Claim not found"
         )
-    return updated_claim
+    return APIJSONResponse(dump_claim(updated_claim))
 
 
 @router.delete("/claims/{claim_id}")
@@ -0,0 +1,36 @@
+from sqlalchemy import event
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+# Verified access token -> user id. Entries never outlive the token's exp.
+token_cache = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+
+# User id -> detached User instance.
+user_cache = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_token(token: str) -> None:
+    token_cache.pop(token)
+
+
+def invalidate_user(user_id) -> None:
+    user_cache.pop(str(user_id))
+
+
+def clear_auth_cache() -> None:
+    token_cache.clear()
+    user_cache.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_user(target.id)
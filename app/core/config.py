@@ -17,13 +17,146 @@ class Settings:
     )
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = int(
+        os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300")
+    )
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_TTL_SECONDS: int = int(
+        os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60")
+    )
+
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(
+        os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5")
+    )
+
+    # Production server (python -m app.serve). 0 workers means one per CPU;
+    # loop/http are uvicorn names ("auto" picks uvloop/httptools if installed).
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "0"))
+    SERVER_LOOP: str = os.getenv("SERVER_LOOP", "auto")
+    SERVER_HTTP: str = os.getenv("SERVER_HTTP", "auto")
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+    SERVER_MAX_REQUESTS_JITTER: int = int(
+        os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000")
+    )
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(
+        os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30")
+    )
+    SERVER_WORKER_TIMEOUT_SECONDS: int = int(
+        os.getenv("SERVER_WORKER_TIMEOUT_SECONDS", "60")
+    )
+    SERVER_METRICS_DIR: str = os.getenv(
+        "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc"
+    )
+
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "db")
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "claims_db")
 
+    CLAIM_BATCH_MAX_SIZE: int = int(os.getenv("CLAIM_BATCH_MAX_SIZE", "1000"))
+    CLAIM_PAGE_DEFAULT_SIZE: int = int(os.getenv("CLAIM_PAGE_DEFAULT_SIZE", "50"))
+    CLAIM_PAGE_MAX_SIZE: int = int(os.getenv("CLAIM_PAGE_MAX_SIZE", "200"))
+    CLAIM_EXPORT_CHUNK_SIZE: int = int(os.getenv("CLAIM_EXPORT_CHUNK_SIZE", "500"))
+
+    CLAIM_PARTITION_MONTHS_AHEAD: int = int(
+        os.getenv("CLAIM_PARTITION_MONTHS_AHEAD", "3")
+    )
+    # Partitions older than this are detached (and archived when
+    # CLAIM_ARCHIVE_DIR is set); 0 keeps everything.
+    CLAIM_PARTITION_RETENTION_MONTHS: int = int(
+        os.getenv("CLAIM_PARTITION_RETENTION_MONTHS", "0")
+    )
+    CLAIM_ARCHIVE_DIR: str = os.getenv("CLAIM_ARCHIVE_DIR", "")
+
+    # reject, flag (stored as pending with duplicate_of set) or allow.
+    CLAIM_DUPLICATE_POLICY: str = os.getenv("CLAIM_DUPLICATE_POLICY", "flag")
+
+    # Empty (the default) disables procedure code validation.
+    PROCEDURE_CODES_PATH: str = os.getenv("PROCEDURE_CODES_PATH", "")
+    PROCEDURE_CODES_RELOAD_SECONDS: float = float(
+        os.getenv("PROCEDURE_CODES_RELOAD_SECONDS", "30")
+    )
+
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = int(
+        os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "300")
+    )
+
+    CLAIM_STATUS_CHANNEL: str = os.getenv("CLAIM_STATUS_CHANNEL", "claim_status")
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_SUBSCRIBER_QUEUE_SIZE: int = int(os.getenv("SSE_SUBSCRIBER_QUEUE_SIZE", "100"))
+
+    WORKER_BATCH_SIZE: int = int(os.getenv("WORKER_BATCH_SIZE", "100"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "10"))
+    WORKER_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("WORKER_POLL_INTERVAL_SECONDS", "1.0")
+    )
+    WORKER_LEASE_SECONDS: int = int(os.getenv("WORKER_LEASE_SECONDS", "300"))
+    WORKER_BACKLOG_INTERVAL_SECONDS: float = float(
+        os.getenv("WORKER_BACKLOG_INTERVAL_SECONDS", "15")
+    )
+    WORKER_DECISION_FUNCTION: str = os.getenv(
+        "WORKER_DECISION_FUNCTION", "app.services.adjudication:adjudicate"
+    )
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "9101"))
+
+    SERVER_TIMING_ENABLED: bool = (
+        os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    )
+    LOG_SUCCESS_SAMPLE_RATE: float = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+    LOG_FILE_PATH: str = os.getenv("LOG_FILE_PATH", "/var/log/api/api.log")
+    LOG_FILE_MAX_BYTES: int = int(
+        os.getenv("LOG_FILE_MAX_BYTES", str(100 * 1024 * 1024))
+    )
+    LOG_FILE_ROTATE_SECONDS: int = int(os.getenv("LOG_FILE_ROTATE_SECONDS", "86400"))
+    LOG_FILE_BACKUP_COUNT: int = int(os.getenv("LOG_FILE_BACKUP_COUNT", "14"))
+    LOG_FILE_COMPRESS: bool = os.getenv("LOG_FILE_COMPRESS", "true").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_OVERFLOW_POLICY: str = os.getenv("LOG_OVERFLOW_POLICY", "drop_new")
+    LOG_QUEUE_BLOCK_SECONDS: float = float(os.getenv("LOG_QUEUE_BLOCK_SECONDS", "0.1"))
+
+    LOKI_HOST: str = os.getenv("LOKI_HOST", "loki")
+    LOKI_PORT: str = os.getenv("LOKI_PORT", "3100")
+    LOKI_PUSH_ENABLED: bool = os.getenv("LOKI_PUSH_ENABLED", "false").lower() == "true"
+    LOKI_BATCH_SIZE: int = int(os.getenv("LOKI_BATCH_SIZE", "500"))
+    LOKI_FLUSH_INTERVAL_SECONDS: float = float(
+        os.getenv("LOKI_FLUSH_INTERVAL_SECONDS", "1.0")
+    )
+    LOKI_QUEUE_SIZE: int = int(os.getenv("LOKI_QUEUE_SIZE", "10000"))
+    LOKI_MAX_RETRIES: int = int(os.getenv("LOKI_MAX_RETRIES", "3"))
+
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "-1"))
+
+    # Comma-separated "host" or "host:port" entries; replicas share the
+    # primary's credentials and database name.
+    DB_REPLICA_HOSTS: List[str] = [
+        host.strip()
+        for host in os.getenv("DB_REPLICA_HOSTS", "").split(",")
+        if host.strip()
+    ]
+    DB_REPLICA_RETRY_SECONDS: float = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+    DB_READ_YOUR_WRITES_SECONDS: float = float(
+        os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5")
+    )
+
     METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9090"))
+    # How often each worker copies its CPU/memory into the multiprocess dir.
+    METRICS_PROCESS_SAMPLE_SECONDS: float = float(
+        os.getenv("METRICS_PROCESS_SAMPLE_SECONDS", "5")
+    )
 
     BACKEND_CORS_ORIGINS: List[str] = (
         os.getenv("BACKEND_CORS_ORIGINS", '["*"]').strip("[]").split(",")
@@ -33,5 +166,20 @@ class Settings:
     def DATABASE_URI(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNCPG_DSN(self) -> str:
+        return self.DATABASE_URI.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+    @property
+    def DATABASE_REPLICA_URIS(self) -> List[str]:
+        uris = []
+        for replica in self.DB_REPLICA_HOSTS:
+            host, _, port = replica.partition(":")
+            uris.append(
+                f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+                f"@{host}:{port or self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+            )
+        return uris
+
 
 settings = Settings()
@@ -1,38 +1,67 @@
+import time
 import uuid
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import token_cache, user_cache
 from app.core.config import settings
-from app.db.base import get_db
+from app.db.base import async_session
 from app.models.user import User
+from app.monitoring.context import span
+from app.monitoring.metrics import auth_cache_requests_total
 from app.schemas.user import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login")
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+async def _authenticate(token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
+
+    user_id = token_cache.get(token)
+    if user_id is None:
+        auth_cache_requests_total.labels(cache="token", result="miss").inc()
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            user_id = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+            token_data = TokenPayload(sub=user_id, exp=payload.get("exp"))
+        except JWTError:
             raise credentials_exception
-        token_data = TokenPayload(sub=user_id, exp=payload.get("exp"))
-    except JWTError:
-        raise credentials_exception
+        token_cache.set(token, token_data.sub, ttl=token_data.exp - time.time())
+    else:
+        auth_cache_requests_total.labels(cache="token", result="hit").inc()
 
-    user = await db.get(User, uuid.UUID(token_data.sub))
+    # Cache misses use their own short-lived session, so authentication never
+    # holds a connection for the rest of the request (or a long-lived stream).
+    user = user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        auth_cache_requests_total.labels(cache="user", result="miss").inc()
+        async with async_session() as db:
+            user = await db.get(User, uuid.UUID(user_id))
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user_id, user)
+    else:
+        auth_cache_requests_total.labels(cache="user", result="hit").inc()
+
+    return user
+
+
+async def get_current_user(
+    request: Request, token: str = Depends(oauth2_scheme)
+) -> User:
+    with span("auth"):
+        user = await _authenticate(token)
+
+    # Picked up by LoggingMiddleware for the request completion event.
+    request.state.user_id = str(user.id)
     return user
@@ -0,0 +1,16 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from app.monitoring.context import span
+
+
+class APIJSONResponse(ORJSONResponse):
+    # OPT_UTC_Z keeps UTC timestamps as "...Z", matching pydantic's output, so
+    # the trusted serializers and the response_model path render identically.
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return orjson.dumps(
+                content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            )
@@ -1,13 +1,33 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Union
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.monitoring.metrics import (
+    password_hash_queue_depth,
+    password_hash_rejected_total,
+    password_hash_wait_seconds,
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a thread pool keeps hashing off the event loop
+# without the pickling overhead of a process pool.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+_hash_waiting = 0
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
 
 def create_access_token(subject: Union[str, Any]) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -35,6 +55,51 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_hash_operation(operation: str, func: Callable[..., Any], *args) -> Any:
+    global _hash_waiting
+
+    if _hash_waiting >= settings.PASSWORD_HASH_MAX_PENDING:
+        password_hash_rejected_total.labels(operation=operation).inc()
+        raise PasswordHashingBusy("Too many pending password operations")
+
+    _hash_waiting += 1
+    password_hash_queue_depth.inc()
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            _hash_slots.acquire(), settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        password_hash_rejected_total.labels(operation=operation).inc()
+        raise PasswordHashingBusy("Timed out waiting for a hashing worker")
+    finally:
+        _hash_waiting -= 1
+        password_hash_queue_depth.dec()
+        password_hash_wait_seconds.labels(operation=operation).observe(
+            time.perf_counter() - started
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_operation(
+        "verify", verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_operation("hash", get_password_hash, password)
+
+
+def shutdown_password_hasher() -> None:
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def decode_refresh_token(token: str) -> str:
     try:
         payload = jwt.decode(
@@ -0,0 +1,55 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.monitoring.context import add_stage_time
+from app.monitoring.metrics import (
+    db_pool_checked_out,
+    db_pool_checkout_timeouts_total,
+    db_pool_checkout_wait_seconds,
+)
+
+
+# Pool events have no hook for the wait before a connection is handed out,
+# so the wait and timeouts are measured around QueuePool._do_get. The pool
+# name comes from the engine's pool_logging_name.
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        pool_name = self._orig_logging_name or "default"
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts_total.labels(pool=pool_name).inc()
+            raise
+        finally:
+            db_pool_checkout_wait_seconds.labels(pool=pool_name).observe(
+                time.perf_counter() - started
+            )
+
+
+def instrument_engine(engine: AsyncEngine, pool_name: str) -> None:
+    checked_out = db_pool_checked_out.labels(pool=pool_name)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+
+    # The async engine runs these hooks in a greenlet that shares the calling
+    # task's context, so statement time lands in the current request's "db"
+    # stage.
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            add_stage_time("db", time.perf_counter() - started)
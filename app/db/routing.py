@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.base import async_session, create_engine
+from app.monitoring.metrics import db_read_sessions_total, db_replica_failures_total
+
+REPLICA_ERRORS = (exc.DBAPIError, exc.TimeoutError, OSError, asyncio.TimeoutError)
+
+T = TypeVar("T")
+
+replica_engines = {
+    f"replica-{i}": create_engine(uri, f"replica-{i}")
+    for i, uri in enumerate(settings.DATABASE_REPLICA_URIS)
+}
+replica_sessions = [
+    (name, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    for name, engine in replica_engines.items()
+]
+
+_next_replica = itertools.count()
+_unhealthy_until: Dict[str, float] = {}
+
+READ_PIN_COOKIE = "read_pin"
+
+# Users who wrote recently read from the primary until replicas catch up.
+# The cache covers reads served by the same worker; the signed read_pin
+# cookie set on the write response carries the pin to the other workers.
+_recent_writers = TTLCache(maxsize=100_000, ttl=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+# Per request: the read_pin cookie sent by the client and the user whose
+# write should set a new one.
+read_pin_var: ContextVar[Optional[Dict[str, Optional[str]]]] = ContextVar(
+    "read_pin", default=None
+)
+
+
+def _sign_pin(user_id: str, expires: int) -> str:
+    message = f"{user_id}.{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def read_pin_cookie(user_id: str, now: Optional[float] = None) -> str:
+    now = time.time() if now is None else now
+    expires = math.ceil(now + settings.DB_READ_YOUR_WRITES_SECONDS)
+    return f"{user_id}.{expires}.{_sign_pin(user_id, expires)}"
+
+
+def _cookie_pins(user_id: str, cookie: Optional[str]) -> bool:
+    if not cookie:
+        return False
+    try:
+        pinned_user, expires, signature = cookie.rsplit(".", 2)
+        expires = int(expires)
+    except ValueError:
+        return False
+    return (
+        pinned_user == user_id
+        and expires > time.time()
+        and hmac.compare_digest(signature, _sign_pin(pinned_user, expires))
+    )
+
+
+def mark_user_write(user_id) -> None:
+    if replica_sessions:
+        _recent_writers.set(str(user_id), True)
+        pin = read_pin_var.get()
+        if pin is not None:
+            pin["written"] = str(user_id)
+
+
+def _pinned_to_primary(user_id) -> bool:
+    if _recent_writers.get(str(user_id)) is not None:
+        return True
+    pin = read_pin_var.get()
+    return pin is not None and _cookie_pins(str(user_id), pin["cookie"])
+
+
+def _request_cookie(scope: Scope, name: str) -> Optional[str]:
+    for header, value in scope["headers"]:
+        if header == b"cookie":
+            try:
+                morsel = SimpleCookie(value.decode("latin-1")).get(name)
+            except CookieError:
+                return None
+            return morsel.value if morsel else None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replica_sessions:
+            await self.app(scope, receive, send)
+            return
+
+        pin = {"cookie": _request_cookie(scope, READ_PIN_COOKIE), "written": None}
+        read_pin_var.set(pin)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and pin["written"]:
+                cookie = (
+                    f"{READ_PIN_COOKIE}={read_pin_cookie(pin['written'])}; "
+                    f"Max-Age={math.ceil(settings.DB_READ_YOUR_WRITES_SECONDS)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", ()))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _mark_unhealthy(name: str) -> None:
+    _unhealthy_until[name] = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+    db_replica_failures_total.labels(pool=name).inc()
+
+
+def _healthy_replicas():
+    now = time.monotonic()
+    start = next(_next_replica)
+    for offset in range(len(replica_sessions)):
+        name, factory = replica_sessions[(start + offset) % len(replica_sessions)]
+        if _unhealthy_until.get(name, 0) <= now:
+            yield name, factory
+
+
+async def _replica_session(user_id) -> Optional[Tuple[str, AsyncSession]]:
+    if user_id is not None and _pinned_to_primary(user_id):
+        return None
+
+    for name, factory in _healthy_replicas():
+        session = factory()
+        try:
+            # Check out a connection up front so an unreachable replica
+            # falls through to the next one instead of failing the request.
+            await session.connection()
+        except REPLICA_ERRORS:
+            await session.close()
+            _mark_unhealthy(name)
+            continue
+        db_read_sessions_total.labels(pool=name).inc()
+        return name, session
+    return None
+
+
+# For callers that stream from the session (the export). Once the replica has
+# handed out a connection, a later failure is raised to the caller.
+@asynccontextmanager
+async def read_session(user_id=None) -> AsyncIterator[AsyncSession]:
+    replica = await _replica_session(user_id)
+    if replica is not None:
+        name, session = replica
+        try:
+            yield session
+        except REPLICA_ERRORS:
+            _mark_unhealthy(name)
+            raise
+        finally:
+            await session.close()
+        return
+
+    db_read_sessions_total.labels(pool="primary").inc()
+    async with async_session() as session:
+        yield session
+
+
+# Runs query(session, *args) on a replica and, if the replica fails part way
+# through, runs it again on the primary. The query must only read.
+async def run_read(user_id, query: Callable[..., Awaitable[T]], *args: Any) -> T:
+    replica = await _replica_session(user_id)
+    if replica is not None:
+        name, session = replica
+        try:
+            return await query(session, *args)
+        except REPLICA_ERRORS:
+            _mark_unhealthy(name)
+        finally:
+            await session.close()
+
+    db_read_sessions_total.labels(pool="primary").inc()
+    async with async_session() as session:
+        return await query(session, *args)
+
+
+async def dispose_replicas() -> None:
+    for engine in replica_engines.values():
+        await engine.dispose()
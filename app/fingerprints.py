@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+
+import structlog
+from sqlalchemy import bindparam, select, update
+
+from app.db.base import async_session, engine
+from app.models.claim import Claim
+from app.models.user import User  # noqa: F401  (resolves Claim.user)
+from app.monitoring.logging import setup_logging, shutdown_logging
+from app.services.claim import ensure_claim_columns, stored_claim_fingerprint
+from app.services.indexes import create_claim_index
+
+logger = structlog.get_logger("fingerprints")
+
+claims_table = Claim.__table__
+
+# Keeps updated_at as it was so the backfill doesn't change ETags or extend
+# worker leases.
+SET_FINGERPRINT = (
+    update(claims_table)
+    .where(claims_table.c.id == bindparam("claim_id"))
+    .values(
+        fingerprint=bindparam("claim_fingerprint"), updated_at=claims_table.c.updated_at
+    )
+)
+
+
+async def ensure_schema() -> None:
+    async with engine.begin() as conn:
+        await ensure_claim_columns(conn)
+
+
+async def create_index() -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await create_claim_index(conn, "ix_claims_user_id_fingerprint")
+
+
+async def backfill_chunk(after, chunk_size: int):
+    # Walks the primary key so each chunk is one short transaction; rows are
+    # only locked by the UPDATE itself and released at commit.
+    query = (
+        select(
+            Claim.id,
+            Claim.patient_id,
+            Claim.provider_id,
+            Claim.service_date,
+            Claim.procedures,
+            Claim.fingerprint,
+        )
+        .order_by(Claim.id)
+        .limit(chunk_size)
+    )
+    if after is not None:
+        query = query.where(Claim.id > after)
+
+    async with async_session() as db:
+        claims = (await db.execute(query)).all()
+        if not claims:
+            return None, 0
+
+        changes = []
+        for claim in claims:
+            fingerprint = stored_claim_fingerprint(claim)
+            if fingerprint != claim.fingerprint:
+                changes.append({"claim_id": claim.id, "claim_fingerprint": fingerprint})
+        if changes:
+            await db.execute(SET_FINGERPRINT, changes)
+        await db.commit()
+
+    return claims[-1].id, len(changes)
+
+
+async def backfill(chunk_size: int, pause: float) -> None:
+    await ensure_schema()
+
+    after, updated = None, 0
+    while True:
+        after, changed = await backfill_chunk(after, chunk_size)
+        if after is None:
+            break
+        updated += changed
+        logger.info("fingerprint_chunk_done", last_id=str(after), updated=updated)
+        if pause:
+            await asyncio.sleep(pause)
+
+    await create_index()
+    logger.info("fingerprint_backfill_finished", claims_updated=updated)
+
+
+async def run(chunk_size: int, pause: float) -> None:
+    try:
+        await backfill(chunk_size, pause)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fingerprint existing claims for duplicate detection"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="Claims fingerprinted per transaction",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.0,
+        help="Seconds to sleep between chunks to limit load",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(run(args.chunk_size, args.pause))
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+
+import structlog
+
+from app.db.base import engine
+from app.models.user import User  # noqa: F401  (resolves Claim.user)
+from app.monitoring.logging import setup_logging, shutdown_logging
+from app.services.indexes import create_claim_index, missing_claim_indexes
+
+logger = structlog.get_logger("indexes")
+
+
+async def build() -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        missing = await missing_claim_indexes(conn)
+        # One at a time: each concurrent build waits out the transactions
+        # running when it starts, and parallel builds would compete for I/O.
+        for name in missing:
+            await create_claim_index(conn, name)
+    logger.info("claim_indexes_ready", created=len(missing))
+
+
+async def run() -> None:
+    try:
+        await build()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Build claim indexes missing from an existing database "
+        "with CREATE INDEX CONCURRENTLY"
+    ).parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(run())
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
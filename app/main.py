@@ -1,20 +1,39 @@
+import asyncio
+import os
+
 import structlog
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy import text
 
 from app.api.api import api_router
 from app.core.config import settings
+from app.core.responses import APIJSONResponse
+from app.core.security import PasswordHashingBusy, shutdown_password_hasher
 from app.db.base import Base, engine
-from app.monitoring.logging import LoggingMiddleware, setup_logging
-from app.monitoring.metrics import setup_metrics
+from app.db.routing import ReadYourWritesMiddleware, dispose_replicas
+from app.monitoring.logging import LoggingMiddleware, setup_logging, shutdown_logging
+from app.monitoring.metrics import (
+    is_multiprocess,
+    mark_process_dead,
+    setup_metrics,
+    start_metrics_server,
+    watch_process_metrics,
+)
+from app.services.claim import ensure_claim_columns
+from app.services.claim_events import claim_status_hub
+from app.services.indexes import missing_claim_indexes
+from app.services.partitions import ensure_partitions, is_partitioned
+from app.services.procedure_codes import load_procedure_codes, watch_procedure_codes
 
 logger = structlog.get_logger("app")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=APIJSONResponse,
 )
 
 app.add_middleware(
@@ -26,12 +45,28 @@ app.add_middleware(
 )
 
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 
 setup_metrics(app)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    logger.warning(
+        "Password hashing saturated",
+        error=str(exc),
+        path=request.url.path,
+        method=request.method,
+    )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(
@@ -49,15 +84,57 @@ async def startup_event():
     setup_logging()
     logger.info("Starting application")
 
+    # Under app.serve the gunicorn master serves the aggregated metrics.
+    if "SERVE_METRICS_PORT" not in os.environ:
+        if start_metrics_server(settings.METRICS_PORT):
+            logger.info("Serving metrics", port=settings.METRICS_PORT)
+        elif settings.METRICS_PORT > 0:
+            logger.info(
+                "Metrics port in use by another worker", port=settings.METRICS_PORT
+            )
+
+    load_procedure_codes()
+    app.state.procedure_codes_watcher = asyncio.create_task(watch_procedure_codes())
+    app.state.process_metrics_watcher = None
+    if is_multiprocess():
+        app.state.process_metrics_watcher = asyncio.create_task(
+            watch_process_metrics(settings.METRICS_PROCESS_SAMPLE_SECONDS)
+        )
+
     async with engine.begin() as conn:
+        # Workers started together by app.serve would otherwise race to
+        # create the same tables.
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext('create_schema'))")
+        )
         await conn.run_sync(Base.metadata.create_all)
+        added = await ensure_claim_columns(conn)
+        if added:
+            logger.info("Added claim columns", columns=added)
+        if await is_partitioned(conn):
+            await ensure_partitions(conn, settings.CLAIM_PARTITION_MONTHS_AHEAD)
+        # Building them here would hold up startup on a large table.
+        missing = await missing_claim_indexes(conn)
+        if missing:
+            logger.warning(
+                "Claim indexes missing; run python -m app.indexes", indexes=missing
+            )
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down application")
 
+    app.state.procedure_codes_watcher.cancel()
+    if app.state.process_metrics_watcher is not None:
+        app.state.process_metrics_watcher.cancel()
+
+    await claim_status_hub.close()
     await engine.dispose()
+    await dispose_replicas()
+    shutdown_password_hasher()
+    mark_process_dead(os.getpid())
+    shutdown_logging()
 
 
 @app.get("/health")
@@ -1,10 +1,10 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Numeric, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Numeric, String
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from app.db.base import Base
 
@@ -19,6 +19,22 @@ class ClaimStatus(str, enum.Enum):
 
 class Claim(Base):
     __tablename__ = "claims"
+    __table_args__ = (
+        Index("ix_claims_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Keeps the adjudication queue scan and backlog count proportional to
+        # the number of waiting claims rather than the whole table.
+        Index(
+            "ix_claims_submitted_created_at",
+            "created_at",
+            postgresql_where=text("status = 'SUBMITTED'"),
+        ),
+        Index("ix_claims_user_id_fingerprint", "user_id", "fingerprint"),
+        # Monthly partitions are created and archived by app.partitions.
+        # Postgres requires the partition key in the primary key, so the
+        # table key is (id, created_at) while the mapper still identifies
+        # claims by id alone.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(
@@ -31,9 +47,18 @@ class Claim(Base):
     total_amount = Column(Numeric(precision=10, scale=2), nullable=False)
     status = Column(Enum(ClaimStatus), default=ClaimStatus.SUBMITTED, nullable=False)
     notes = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    fingerprint = Column(String(64), nullable=True)
+    duplicate_of = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True,
+        nullable=False,
+    )
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __mapper_args__ = {"primary_key": [id]}
+
     user = relationship("User", backref="claims")
@@ -0,0 +1,136 @@
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    Date,
+    Enum,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    event,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+from app.models.claim import Claim, ClaimStatus
+
+
+class ClaimSummary(Base):
+    __tablename__ = "claim_summaries"
+    __table_args__ = (
+        Index("ix_claim_summaries_provider_id_day", "provider_id", "day"),
+    )
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(Date, primary_key=True)
+    provider_id = Column(String, primary_key=True)
+    status = Column(Enum(ClaimStatus), primary_key=True)
+    claim_count = Column(BigInteger, nullable=False, default=0)
+    total_amount = Column(Numeric(precision=14, scale=2), nullable=False, default=0)
+
+
+# The summary is kept current by statement-level triggers on claims, so every
+# writer (the API, batch submissions, the adjudication worker, lease requeues)
+# updates it in its own transaction. Each statement folds its rows into one
+# signed delta per bucket and applies them in key order, which keeps
+# concurrent writers from deadlocking on shared summary rows.
+SUMMARY_DELTA_SQL = """
+    WITH deltas AS (
+        SELECT user_id, day, provider_id, status,
+               sum(claim_count) AS claim_count,
+               sum(total_amount) AS total_amount
+        FROM ({changes}) AS changes
+        GROUP BY user_id, day, provider_id, status
+        HAVING sum(claim_count) <> 0 OR sum(total_amount) <> 0
+    )
+    INSERT INTO claim_summaries
+        (user_id, day, provider_id, status, claim_count, total_amount)
+    SELECT d.user_id, d.day, d.provider_id, d.status, d.claim_count, d.total_amount
+    FROM deltas d
+    -- Skips buckets whose user is being deleted; ON DELETE CASCADE removes
+    -- their summary rows anyway.
+    WHERE EXISTS (SELECT 1 FROM users WHERE users.id = d.user_id)
+    ORDER BY d.user_id, d.day, d.provider_id, d.status
+    ON CONFLICT (user_id, day, provider_id, status) DO UPDATE
+    SET claim_count = claim_summaries.claim_count + EXCLUDED.claim_count,
+        total_amount = claim_summaries.total_amount + EXCLUDED.total_amount;
+"""
+
+SUMMARY_ROW_SQL = """
+    SELECT {alias}.user_id,
+           ({alias}.created_at AT TIME ZONE 'UTC')::date AS day,
+           {alias}.provider_id, {alias}.status,
+           {sign}1 AS claim_count, {sign}{alias}.total_amount AS total_amount
+    FROM {table} AS {alias}
+"""
+
+ADDED = SUMMARY_ROW_SQL.format(alias="n", sign="", table="new_claims")
+REMOVED = SUMMARY_ROW_SQL.format(alias="o", sign="-", table="old_claims")
+CHANGED = """
+    JOIN {other} USING (id)
+    WHERE (o.user_id, o.created_at, o.provider_id, o.status, o.total_amount)
+        IS DISTINCT FROM
+        (n.user_id, n.created_at, n.provider_id, n.status, n.total_amount)
+"""
+
+UPDATED = " UNION ALL ".join(
+    [
+        ADDED + CHANGED.format(other="old_claims AS o"),
+        REMOVED + CHANGED.format(other="new_claims AS n"),
+    ]
+)
+
+SUMMARY_FUNCTION_DDL = f"""
+CREATE OR REPLACE FUNCTION claim_summaries_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {SUMMARY_DELTA_SQL.format(changes=ADDED)}
+    ELSIF TG_OP = 'DELETE' THEN
+        {SUMMARY_DELTA_SQL.format(changes=REMOVED)}
+    ELSE
+        {SUMMARY_DELTA_SQL.format(changes=UPDATED)}
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+SUMMARY_TRIGGERS = {
+    "INSERT": "REFERENCING NEW TABLE AS new_claims",
+    "UPDATE": "REFERENCING OLD TABLE AS old_claims NEW TABLE AS new_claims",
+    "DELETE": "REFERENCING OLD TABLE AS old_claims",
+}
+
+# Depending on claims orders CREATE TABLE so the triggers can be attached as
+# soon as the summary table exists, including on databases where claims
+# already did.
+ClaimSummary.__table__.add_is_dependent_on(Claim.__table__)
+
+event.listen(
+    ClaimSummary.__table__,
+    "after_create",
+    DDL(SUMMARY_FUNCTION_DDL).execute_if(dialect="postgresql"),
+)
+for operation, transition in SUMMARY_TRIGGERS.items():
+    trigger = f"claim_summaries_{operation.lower()}"
+    event.listen(
+        ClaimSummary.__table__,
+        "after_create",
+        DDL(f"DROP TRIGGER IF EXISTS {trigger} ON claims").execute_if(
+            dialect="postgresql"
+        ),
+    )
+    event.listen(
+        ClaimSummary.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {trigger} AFTER {operation} ON claims {transition} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION claim_summaries_apply()"
+        ).execute_if(dialect="postgresql"),
+    )
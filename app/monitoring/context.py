@@ -0,0 +1,53 @@
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+stage_timings_var: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "stage_timings", default=None
+)
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+# Client supplied IDs end up in log lines and a response header, so anything
+# that is not a short token is replaced rather than echoed back.
+def resolve_request_id(header_value: Optional[bytes]) -> str:
+    if header_value:
+        value = header_value.decode("latin-1")
+        if _REQUEST_ID_RE.match(value):
+            return value
+    return uuid.uuid4().hex
+
+
+def start_request(request_id: str) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    request_id_var.set(request_id)
+    stage_timings_var.set(timings)
+    return timings
+
+
+def add_stage_time(stage: str, seconds: float) -> None:
+    timings = stage_timings_var.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(stage, time.perf_counter() - started)
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> bytes:
+    entries = [
+        f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries).encode("latin-1")
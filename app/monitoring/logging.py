@@ -1,83 +1,384 @@
+import fcntl
+import glob
+import gzip
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import shutil
 import sys
-import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Optional
 
+import orjson
 import requests
 import structlog
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.monitoring.context import (
+    request_id_var,
+    resolve_request_id,
+    server_timing_header,
+    start_request,
+)
+from app.monitoring.metrics import (
+    log_queue_depth,
+    log_records_dropped_total,
+    loki_records_dropped_total,
+    loki_records_sent_total,
+    request_stage_duration_seconds,
+)
+
+_STOP = object()
+_loki_handler = None
+_log_listener = None
+_log_queue_handler = None
+
+
+class LogOverflowPolicy(str, Enum):
+    DROP_NEW = "drop_new"
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+
+# Log calls only render and enqueue; a QueueListener thread does the file and
+# stdout writes. When the queue is full the overflow policy decides whether
+# the new record is dropped, the oldest queued record is evicted, or the
+# caller waits up to block_timeout before dropping.
+class LogQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue, policy=LogOverflowPolicy.DROP_NEW, block_timeout=0.1):
+        super().__init__(log_queue)
+        self.policy = LogOverflowPolicy(policy)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.policy is LogOverflowPolicy.BLOCK:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self._drop("block_timeout")
+            return
+
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.policy is LogOverflowPolicy.DROP_NEW:
+                self._drop("queue_full")
+                return
+        self._evict_and_put(record)
 
+    def _evict_and_put(self, record):
+        try:
+            self.queue.get_nowait()
+            self._drop("evicted")
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop("queue_full")
+
+    def _drop(self, reason):
+        self.dropped += 1
+        log_records_dropped_total.labels(reason=reason).inc()
+        log_queue_depth.set(self.queue.qsize())
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    # The stock listener uses put_nowait for its sentinel, which raises when
+    # the queue is full at shutdown; wait for the listener to make room.
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    # Updated from the writer thread rather than via set_function, which
+    # multiprocess mode can't aggregate.
+    def handle(self, record):
+        super().handle(record)
+        log_queue_depth.set(self.queue.qsize())
+
+
+# Rolls the file over when it reaches max_bytes or when the current
+# interval (aligned to UTC, so daily rotation happens at midnight) ends.
+# Rotated files get a timestamp suffix and are gzipped and pruned on a
+# separate thread so the listener never waits on compression.
+#
+# Several worker processes may share one file: rotation happens under an
+# flock, and a process whose open file has been renamed away by another one
+# reopens the path instead of rotating again.
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    def __init__(
+        self,
+        filename,
+        max_bytes=0,
+        interval_seconds=0,
+        backup_count=0,
+        compress=True,
+    ):
+        super().__init__(filename, "a", encoding="utf-8", delay=False)
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.lock_path = f"{self.baseFilename}.lock"
+        self.rollover_at = self._next_rollover(time.time())
+        self._file_id = self._stream_id()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="log-compress"
+        )
 
+    def _next_rollover(self, now):
+        if self.interval_seconds <= 0:
+            return None
+        return (int(now) // self.interval_seconds + 1) * self.interval_seconds
+
+    def _stream_id(self):
+        st = os.fstat(self.stream.fileno())
+        return st.st_dev, st.st_ino
+
+    def _reopen_if_moved(self):
+        try:
+            st = os.stat(self.baseFilename)
+            if (st.st_dev, st.st_ino) == self._file_id:
+                return False
+        except FileNotFoundError:
+            pass
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+        self._file_id = self._stream_id()
+        return True
+
+    def shouldRollover(self, record):
+        self._reopen_if_moved()
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        now = time.time()
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not self._reopen_if_moved():
+                self._rotate(now)
+
+        self.rollover_at = self._next_rollover(now)
+
+    def _rotate(self, now):
+        self.stream.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+        rotated = f"{self.baseFilename}.{stamp}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(f"{rotated}.gz"):
+            rotated = f"{self.baseFilename}.{stamp}-{suffix}"
+            suffix += 1
+
+        if os.path.getsize(self.baseFilename):
+            os.rename(self.baseFilename, rotated)
+            self._executor.submit(self._finish_rotation, rotated)
+
+        self.stream = self._open()
+        self._file_id = self._stream_id()
+
+    def _finish_rotation(self, rotated):
+        try:
+            if self.compress:
+                with open(rotated, "rb") as src, gzip.open(
+                    f"{rotated}.gz.partial", "wb", compresslevel=6
+                ) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                shutil.copystat(rotated, f"{rotated}.gz.partial")
+                os.replace(f"{rotated}.gz.partial", f"{rotated}.gz")
+                os.remove(rotated)
+            self._prune()
+        except OSError as e:
+            print(f"Failed to compress rotated log {rotated}: {e}", file=sys.stderr)
+
+    def _prune(self):
+        if self.backup_count <= 0:
+            return
+        backups = []
+        for path in glob.glob(f"{glob.escape(self.baseFilename)}.*"):
+            if path.endswith((".partial", ".lock")):
+                continue
+            try:
+                backups.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        backups.sort()
+        for _, path in backups[: -self.backup_count]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        super().close()
+        self._executor.shutdown(wait=True)
+
+
+# emit() only enqueues; a background thread batches records by size or age,
+# groups them into one stream per label set and pushes gzipped payloads.
 class LokiHandler(logging.Handler):
-    def __init__(self, host, port):
+    def __init__(
+        self,
+        host,
+        port,
+        url=None,
+        batch_size=500,
+        flush_interval=1.0,
+        queue_size=10000,
+        max_retries=3,
+        backoff=0.5,
+        timeout=5.0,
+    ):
         super().__init__()
         self.host = host
         self.port = port
-        self.url = f"http://{host}:{port}/loki/api/v1/push"
-        self.buffer = []
-        self.max_buffer_size = 100
+        self.url = url or f"http://{host}:{port}/loki/api/v1/push"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._session = requests.Session()
+        self._thread = threading.Thread(
+            target=self._run, name="loki-shipper", daemon=True
+        )
+        self._thread.start()
 
     def emit(self, record):
-        try:
-            log_entry = json.loads(self.format(record))
-
-            labels = {
-                "level": record.levelname.lower(),
-                "logger": record.name,
-                "application": "api",
-            }
-
-            for key in [
-                "request_id",
-                "method",
-                "path",
-                "status_code",
-                "client_ip",
-                "user_id",
-            ]:
-                if key in log_entry:
-                    labels[key] = str(log_entry[key])
-
-            ts_ns = int(record.created * 1_000_000_000)
-            loki_payload = {
-                "streams": [
-                    {"stream": labels, "values": [[str(ts_ns), json.dumps(log_entry)]]}
-                ]
-            }
-
-            self.buffer.append(loki_payload)
-
-            if len(self.buffer) >= self.max_buffer_size:
-                self.flush()
-
-        except Exception as e:
-            print(f"Error formatting log for Loki: {str(e)}")
-
-    def flush(self):
-        if not self.buffer:
+        # Records logged by the shipper itself (e.g. urllib3 warnings) would
+        # feed back into the queue it is draining.
+        if threading.current_thread() is self._thread:
             return
 
-        combined_payload = {"streams": []}
-        for payload in self.buffer:
-            combined_payload["streams"].extend(payload["streams"])
+        try:
+            labels = (
+                ("level", record.levelname.lower()),
+                ("logger", record.name),
+                ("application", "api"),
+            )
+            ts_ns = str(int(record.created * 1_000_000_000))
+            self._queue.put_nowait((labels, ts_ns, self.format(record)))
+        except queue.Full:
+            self._drop(1, "queue_full")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self, timeout=None):
+        if not self._thread.is_alive():
+            return
 
+        done = threading.Event()
         try:
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(self.url, headers=headers, json=combined_payload)
-            if response.status_code >= 400:
-                print(f"Error sending logs to Loki: {response.text}")
-        except Exception as e:
-            print(f"Exception sending logs to Loki: {str(e)}")
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self._session.close()
+        super().close()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._send(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._send(batch)
+                batch = []
+                item.set()
+            elif item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._send(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _send(self, batch):
+        if not batch:
+            return
 
-        self.buffer = []
+        streams = {}
+        for labels, ts_ns, line in batch:
+            streams.setdefault(labels, []).append([ts_ns, line])
+
+        payload = {
+            "streams": [
+                {"stream": dict(labels), "values": values}
+                for labels, values in streams.items()
+            ]
+        }
+        body = gzip.compress(json.dumps(payload).encode("utf-8"))
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._session.post(
+                    self.url, data=body, headers=headers, timeout=self.timeout
+                )
+                if response.status_code < 300:
+                    loki_records_sent_total.inc(len(batch))
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    print(
+                        f"Loki rejected log batch: {response.status_code} {response.text}",
+                        file=sys.stderr,
+                    )
+                    self._drop(len(batch), "rejected")
+                    return
+            except requests.RequestException as e:
+                print(f"Exception sending logs to Loki: {str(e)}", file=sys.stderr)
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2**attempt))
+
+        self._drop(len(batch), "send_failed")
+
+    def _drop(self, count, reason):
+        self.dropped += count
+        loki_records_dropped_total.labels(reason=reason).inc(count)
 
 
 def setup_logging_handler():
-    handler = LokiHandler(host=settings.LOKI_HOST, port=settings.LOKI_PORT)
+    handler = LokiHandler(
+        host=settings.LOKI_HOST,
+        port=settings.LOKI_PORT,
+        batch_size=settings.LOKI_BATCH_SIZE,
+        flush_interval=settings.LOKI_FLUSH_INTERVAL_SECONDS,
+        queue_size=settings.LOKI_QUEUE_SIZE,
+        max_retries=settings.LOKI_MAX_RETRIES,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
     return handler
 
 
@@ -87,14 +388,30 @@ class LokiProcessor:
 
 
 def request_id_processor(_, __, event_dict):
-    event_dict["request_id"] = str(uuid.uuid4())
+    request_id = request_id_var.get()
+    if request_id is not None:
+        event_dict.setdefault("request_id", request_id)
     return event_dict
 
 
-def setup_logging():
-    log_dir = "/var/log/api"
-    os.makedirs(log_dir, exist_ok=True)
+def orjson_dumps(obj, **kwargs):
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, **kwargs).decode()
+
 
+def setup_file_handler():
+    os.makedirs(os.path.dirname(settings.LOG_FILE_PATH) or ".", exist_ok=True)
+    handler = CompressingRotatingFileHandler(
+        settings.LOG_FILE_PATH,
+        max_bytes=settings.LOG_FILE_MAX_BYTES,
+        interval_seconds=settings.LOG_FILE_ROTATE_SECONDS,
+        backup_count=settings.LOG_FILE_BACKUP_COUNT,
+        compress=settings.LOG_FILE_COMPRESS,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def setup_logging():
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
@@ -103,60 +420,156 @@ def setup_logging():
             structlog.stdlib.PositionalArgumentsFormatter(),
             structlog.processors.TimeStamper(fmt="iso"),
             request_id_processor,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=orjson_dumps),
         ],
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
 
-    file_handler = logging.FileHandler(f"{log_dir}/api.log")
-    file_handler.setFormatter(logging.Formatter("%(message)s"))
-
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(logging.Formatter("%(message)s"))
-
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+
+    global _log_listener, _log_queue_handler
+    if _log_listener is None:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        _log_queue_handler = LogQueueHandler(
+            log_queue,
+            policy=settings.LOG_OVERFLOW_POLICY,
+            block_timeout=settings.LOG_QUEUE_BLOCK_SECONDS,
+        )
+        _log_listener = LogQueueListener(
+            log_queue, setup_file_handler(), console_handler
+        )
+        _log_listener.start()
+        root_logger.addHandler(_log_queue_handler)
+
+    global _loki_handler
+    if settings.LOKI_PUSH_ENABLED and _loki_handler is None:
+        _loki_handler = setup_logging_handler()
+        root_logger.addHandler(_loki_handler)
+
+
+def shutdown_logging():
+    global _loki_handler, _log_listener, _log_queue_handler
+    if _loki_handler is not None:
+        logging.getLogger().removeHandler(_loki_handler)
+        _loki_handler.close()
+        _loki_handler = None
+
+    if _log_listener is not None:
+        logging.getLogger().removeHandler(_log_queue_handler)
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+        _log_queue_handler = None
 
 
 def get_logger(name: str):
     return structlog.get_logger(name)
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
+# Raw ASGI middleware: avoids the per-request task and body stream that
+# BaseHTTPMiddleware adds, and logs one completion event per request.
+# The request id and stage timings live in contextvars; they are not reset
+# afterwards because each request runs in its own task, and the app's
+# exception handlers (outside this middleware) should still see the id.
+class LoggingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        success_sample_rate: Optional[float] = None,
+        server_timing: Optional[bool] = None,
+    ):
+        self.app = app
         self.logger = get_logger("api")
-
-    async def dispatch(self, request, call_next):
-        request_id = str(uuid.uuid4())
-
-        self.logger.info(
-            "request_started",
-            request_id=request_id,
-            method=request.method,
-            path=request.url.path,
-            client_ip=request.client.host,
+        self.success_sample_rate = (
+            settings.LOG_SUCCESS_SAMPLE_RATE
+            if success_sample_rate is None
+            else success_sample_rate
+        )
+        self.server_timing = (
+            settings.SERVER_TIMING_ENABLED if server_timing is None else server_timing
         )
 
-        try:
-            response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            self.logger.info(
-                "request_completed",
-                request_id=request_id,
-                status_code=response.status_code,
-            )
+        started = time.perf_counter()
+        status_code = 500
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value
+                break
+        request_id = resolve_request_id(request_id)
+        timings = start_request(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                if self.server_timing:
+                    headers.append(
+                        (
+                            b"server-timing",
+                            server_timing_header(
+                                timings, time.perf_counter() - started
+                            ),
+                        )
+                    )
+                message = {**message, "headers": headers}
+            await send(message)
 
-            return response
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
+            self._log_request(scope, started, 500, error=e)
+            raise
+        finally:
+            for stage, seconds in timings.items():
+                request_stage_duration_seconds.labels(stage=stage).observe(seconds)
+
+        self._log_request(scope, started, status_code)
+
+    def _log_request(self, scope, started, status_code, error=None):
+        if (
+            status_code < 400
+            and self.success_sample_rate < 1.0
+            and random.random() >= self.success_sample_rate
+        ):
+            return
+
+        route = scope.get("route")
+        client = scope.get("client")
+        fields = {
+            "method": scope["method"],
+            "path": getattr(route, "path", scope["path"]),
+            "status_code": status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "client_ip": client[0] if client else None,
+            "user_id": scope.get("state", {}).get("user_id"),
+        }
+
+        if error is not None:
             self.logger.error(
                 "request_failed",
-                request_id=request_id,
-                error=str(e),
-                error_type=type(e).__name__,
+                error=str(error),
+                error_type=type(error).__name__,
+                **fields,
             )
-            raise
+        elif status_code >= 500:
+            self.logger.error("request_completed", **fields)
+        elif status_code >= 400:
+            self.logger.warning("request_completed", **fields)
+        else:
+            self.logger.info("request_completed", **fields)
@@ -1,5 +1,23 @@
-from prometheus_client import Counter, Gauge, Histogram
-from prometheus_fastapi_instrumentator import Instrumentator, metrics
+import asyncio
+import os
+import time
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    multiprocess,
+    start_http_server,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With PROMETHEUS_MULTIPROC_DIR set (before prometheus_client is imported),
+# every worker writes its samples to mmap files in that directory and the
+# metrics server aggregates them. Gauges declare how worker values combine;
+# "live" modes drop the values of workers that have exited.
 
 http_requests_total = Counter(
     "http_requests_total",
@@ -13,19 +31,246 @@ http_request_duration_seconds = Histogram(
     ["method", "endpoint"],
 )
 
-active_requests = Gauge("active_requests", "Number of active HTTP requests")
+active_requests = Gauge(
+    "active_requests", "Number of active HTTP requests", multiprocess_mode="livesum"
+)
+
+request_stage_duration_seconds = Histogram(
+    "request_stage_duration_seconds",
+    "Time spent per request in each stage (auth, db, validation, serialize)",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
 
 claim_processing_total = Counter(
     "claim_processing_total", "Total number of claims processed", ["status"]
 )
 
+auth_cache_requests_total = Counter(
+    "auth_cache_requests_total",
+    "Authentication cache lookups",
+    ["cache", "result"],
+)
+
+password_hash_queue_depth = Gauge(
+    "password_hash_queue_depth",
+    "Password hash/verify operations waiting for a hashing worker",
+    multiprocess_mode="livesum",
+)
+
+password_hash_wait_seconds = Histogram(
+    "password_hash_wait_seconds",
+    "Time spent waiting for a hashing worker",
+    ["operation"],
+)
+
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the hashing queue was full or timed out",
+    ["operation"],
+)
+
+loki_records_sent_total = Counter(
+    "loki_records_sent_total", "Log records successfully pushed to Loki"
+)
+
+loki_records_dropped_total = Counter(
+    "loki_records_dropped_total",
+    "Log records dropped by the Loki shipper",
+    ["reason"],
+)
+
+log_queue_depth = Gauge(
+    "log_queue_depth",
+    "Log records waiting for the file and console sinks",
+    multiprocess_mode="livesum",
+)
+
+log_records_dropped_total = Counter(
+    "log_records_dropped_total",
+    "Log records dropped before reaching the file and console sinks",
+    ["reason"],
+)
+
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+db_pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+db_pool_checkout_timeouts_total = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Database connection checkouts that timed out waiting for the pool",
+    ["pool"],
+)
+
+db_read_sessions_total = Counter(
+    "db_read_sessions_total",
+    "Read-only sessions opened, by the pool that served them",
+    ["pool"],
+)
+
+db_replica_failures_total = Counter(
+    "db_replica_failures_total",
+    "Replica errors that took a replica out of read rotation",
+    ["pool"],
+)
+
+claim_status_subscribers = Gauge(
+    "claim_status_subscribers",
+    "Connected claim status stream subscribers",
+    multiprocess_mode="livesum",
+)
+
+claim_status_fanout_latency_seconds = Histogram(
+    "claim_status_fanout_latency_seconds",
+    "Time from publishing a claim status change to queueing it for subscribers",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+claim_status_events_dropped_total = Counter(
+    "claim_status_events_dropped_total",
+    "Claim status events dropped because a subscriber queue was full",
+)
+
+worker_batch_duration_seconds = Histogram(
+    "worker_batch_duration_seconds",
+    "Time to claim, adjudicate and write back one batch of claims",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+worker_batch_size = Histogram(
+    "worker_batch_size",
+    "Number of claims picked up per adjudication batch",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+worker_claims_failed_total = Counter(
+    "worker_claims_failed_total",
+    "Claims whose decision function raised and were parked as pending",
+)
+
+claims_queue_backlog = Gauge(
+    "claims_queue_backlog",
+    "Claims waiting in SUBMITTED status",
+    multiprocess_mode="livemostrecent",
+)
+
+
+claim_validation_rejections_total = Counter(
+    "claim_validation_rejections_total",
+    "Procedure checks failed by submitted claims",
+    ["reason"],
+)
+
+
+# Pure ASGI, like LoggingMiddleware. Requests that match no route are
+# counted under one "unmatched" endpoint so scanners can't blow up label
+# cardinality with arbitrary paths.
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        active_requests.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            active_requests.dec()
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests_total.labels(method, endpoint, str(status_code)).inc()
+            http_request_duration_seconds.labels(method, endpoint).observe(
+                time.perf_counter() - started
+            )
+
 
 def setup_metrics(app):
-    instrumentator = Instrumentator()
+    app.add_middleware(MetricsMiddleware)
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry() -> CollectorRegistry:
+    if not is_multiprocess():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+# Serves /metrics from a daemon thread on its own port, so scrapes don't
+# queue behind API traffic on the event loop. In multiprocess mode any one
+# process can serve the aggregate; the others fail to bind and skip it.
+def start_metrics_server(port: int) -> bool:
+    if port <= 0:
+        return False
+    try:
+        start_http_server(port, registry=metrics_registry())
+    except OSError:
+        return False
+    return True
+
+
+# The multiprocess registry has no ProcessCollector (it would only see the
+# process serving /metrics), so each worker copies its own /proc figures into
+# gauges under the standard names, one series per pid. They are created on
+# first use so processes that never sample (the master) export no series,
+# and kept out of the default registry, where the stock ProcessCollector
+# already owns the names.
+_process_collector = ProcessCollector(registry=None)
+_process_gauges = {}
+
+
+def _process_gauge(name: str, documentation: str) -> Gauge:
+    if name not in _process_gauges:
+        _process_gauges[name] = Gauge(
+            name, documentation, registry=None, multiprocess_mode="liveall"
+        )
+    return _process_gauges[name]
+
+
+def sample_process_metrics() -> None:
+    for family in _process_collector.collect():
+        if family.name == "process_cpu_seconds":
+            name = "process_cpu_seconds_total"
+        elif family.name in ("process_resident_memory_bytes", "process_open_fds"):
+            name = family.name
+        else:
+            continue
+        _process_gauge(name, family.documentation).set(family.samples[0].value)
+
 
-    instrumentator.add(metrics.latency())
-    instrumentator.add(metrics.requests())
+async def watch_process_metrics(interval: float) -> None:
+    while True:
+        sample_process_metrics()
+        await asyncio.sleep(interval)
 
-    instrumentator.instrument(app).expose(app, include_in_schema=True, should_gzip=True)
 
-    return instrumentator
+def mark_process_dead(pid: int) -> None:
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import sys
+
+import structlog
+
+from app.core.config import settings
+from app.db.base import engine
+from app.monitoring.logging import setup_logging, shutdown_logging
+from app.services.partitions import (
+    archive_partition,
+    detach_partition,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    utc_today,
+)
+
+logger = structlog.get_logger("partitions")
+
+
+async def maintain(months_ahead: int, retention_months: int, archive_dir: str) -> int:
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            logger.error("claims_table_not_partitioned")
+            return 1
+        created = await ensure_partitions(conn, months_ahead)
+        partitions = await list_partitions(conn)
+
+    expired = []
+    if retention_months > 0:
+        cutoff = month_start(utc_today(), -retention_months)
+        expired = [partition for partition in partitions if partition.end <= cutoff]
+
+    # One short transaction per step, so the ACCESS EXCLUSIVE lock taken by
+    # DETACH is released before the (slow) archive copy starts.
+    for partition in expired:
+        if partition.attached:
+            async with engine.begin() as conn:
+                await detach_partition(conn, partition)
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+            async with engine.begin() as conn:
+                await archive_partition(conn, partition, archive_dir)
+
+    logger.info(
+        "claim_partitions_maintained",
+        created=len(created),
+        expired=len(expired),
+        archived=len(expired) if archive_dir else 0,
+    )
+    return 0
+
+
+async def run(months_ahead: int, retention_months: int, archive_dir: str) -> int:
+    try:
+        return await maintain(months_ahead, retention_months, archive_dir)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create upcoming claim partitions and archive expired ones"
+    )
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=settings.CLAIM_PARTITION_MONTHS_AHEAD,
+        help="Monthly partitions to keep created beyond the current month",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.CLAIM_PARTITION_RETENTION_MONTHS,
+        help="Detach partitions that ended more than this many months ago (0: never)",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=settings.CLAIM_ARCHIVE_DIR,
+        help="Write detached partitions here as gzipped CSV, then drop them",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        exit_code = asyncio.run(
+            run(args.months_ahead, args.retention_months, args.archive_dir)
+        )
+    finally:
+        shutdown_logging()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import uuid
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
+import orjson
 from pydantic import BaseModel, Field
 
 
@@ -46,6 +47,7 @@ class ClaimUpdate(BaseModel):
 class ClaimInDB(ClaimBase):
     id: uuid.UUID
     status: ClaimStatusEnum = ClaimStatusEnum.SUBMITTED
+    duplicate_of: Optional[uuid.UUID] = None
     created_at: datetime
     updated_at: datetime
 
@@ -60,3 +62,80 @@ class ClaimStatusResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ClaimPage(BaseModel):
+    items: List[ClaimInDB]
+    next_cursor: Optional[str] = None
+
+
+class ClaimBatchCreate(BaseModel):
+    claims: List[Dict[str, Any]] = Field(..., min_length=1)
+    atomic: bool = False
+
+
+class ClaimBatchItemResult(BaseModel):
+    index: int
+    success: bool
+    claim: Optional[ClaimInDB] = None
+    error: Optional[str] = None
+
+
+class ClaimBatchResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[ClaimBatchItemResult]
+
+
+class ClaimSummaryBucket(BaseModel):
+    day: date
+    provider_id: str
+    status: ClaimStatusEnum
+    claim_count: int
+    total_amount: float
+
+    class Config:
+        from_attributes = True
+
+
+class ClaimSummaryResponse(BaseModel):
+    buckets: List[ClaimSummaryBucket]
+    claim_count: int
+    total_amount: float
+
+
+# Trusted output path for claims read back from our own database. The rows
+# already satisfy the schemas above, so these build the ClaimInDB and
+# ClaimStatusResponse shapes directly instead of re-validating every field.
+def dump_claim(claim: Any) -> Dict[str, Any]:
+    service_date = claim.service_date
+    if isinstance(service_date, datetime):
+        service_date = service_date.date()
+    return {
+        "patient_id": claim.patient_id,
+        "provider_id": claim.provider_id,
+        "service_date": service_date,
+        "procedures": claim.procedures,
+        "total_amount": float(claim.total_amount),
+        "notes": claim.notes,
+        "id": claim.id,
+        "status": claim.status.value,
+        "duplicate_of": claim.duplicate_of,
+        "created_at": claim.created_at,
+        "updated_at": claim.updated_at,
+    }
+
+
+# dump_claim with JSON-native values, for callers that store or re-encode the
+# claim rather than handing it to APIJSONResponse.
+def dump_claim_json(claim: Any) -> Dict[str, Any]:
+    return orjson.loads(orjson.dumps(dump_claim(claim), option=orjson.OPT_UTC_Z))
+
+
+def dump_claim_status(claim: Any) -> Dict[str, Any]:
+    return {
+        "id": claim.id,
+        "status": claim.status.value,
+        "updated_at": claim.updated_at,
+    }
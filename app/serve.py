@@ -0,0 +1,120 @@
+import argparse
+import glob
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.importer import import_from_string
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+def default_workers() -> int:
+    # Honors CPU pinning (e.g. docker --cpuset-cpus), unlike os.cpu_count().
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class AppWorker(UvicornWorker):
+    # uvicorn drains in-flight requests for this long after SIGTERM; gunicorn's
+    # graceful_timeout (a little longer) leaves room for the lifespan shutdown.
+    CONFIG_KWARGS = {
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    }
+
+
+# Hooks run in the gunicorn master. prometheus_client picks its value store
+# when first imported, so the metrics module is only imported here, after
+# main() has set PROMETHEUS_MULTIPROC_DIR.
+def on_starting(server):
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(path)
+
+
+def when_ready(server):
+    from app.monitoring.metrics import start_metrics_server
+
+    port = int(os.environ["SERVE_METRICS_PORT"])
+    if start_metrics_server(port):
+        server.log.info("Serving metrics on port %s", port)
+
+
+def child_exit(server, worker):
+    from app.monitoring.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+class Server(BaseApplication):
+    def __init__(self, app: str, options: dict):
+        self.app = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    # Called in each worker after fork, so workers import the app themselves.
+    def load(self):
+        return import_from_string(self.app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with multiple workers")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app import path")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or default_workers(),
+        help="Worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS,
+        help="Recycle a worker after this many requests (0: never)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.METRICS_PORT,
+        help="Port for the aggregated /metrics listener (0: disabled)",
+    )
+    args = parser.parse_args()
+
+    # Workers inherit the environment: they record metrics into the shared
+    # directory, and SERVE_METRICS_PORT tells their startup to leave the
+    # metrics port to the master.
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.SERVER_METRICS_DIR
+    os.makedirs(settings.SERVER_METRICS_DIR, exist_ok=True)
+    os.environ["SERVE_METRICS_PORT"] = str(args.metrics_port)
+
+    Server(
+        args.app,
+        {
+            "bind": f"{args.host}:{args.port}",
+            "workers": args.workers,
+            "worker_class": "app.serve.AppWorker",
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+            "max_requests": args.max_requests,
+            "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+            "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS + 5,
+            "timeout": settings.SERVER_WORKER_TIMEOUT_SECONDS,
+            "on_starting": on_starting,
+            "when_ready": when_ready,
+            "child_exit": child_exit,
+        },
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+from app.models.claim import Claim, ClaimStatus
+
+CENT = Decimal("0.01")
+
+
+def adjudicate(claim: Claim) -> ClaimStatus:
+    if not claim.procedures:
+        return ClaimStatus.DENIED
+
+    procedures_total = sum(
+        Decimal(str(procedure["amount"])) for procedure in claim.procedures
+    )
+    if procedures_total.quantize(CENT) != Decimal(claim.total_amount).quantize(CENT):
+        return ClaimStatus.DENIED
+
+    return ClaimStatus.APPROVED
@@ -1,30 +1,276 @@
+import base64
+import hashlib
+import json
 import uuid
-from typing import List, Optional
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from sqlalchemy import Row, delete, insert, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
+from app.db.routing import mark_user_write
 from app.models.claim import Claim, ClaimStatus
+from app.monitoring.context import span
 from app.schemas.claim import ClaimCreate, ClaimUpdate
+from app.services.claim_events import status_notification
+from app.services.procedure_codes import validate_claims
+
+
+class InvalidClaim(ValueError):
+    pass
+
+
+class DuplicateClaim(Exception):
+    def __init__(self, duplicate_of: uuid.UUID):
+        super().__init__(f"Duplicate of claim {duplicate_of}")
+        self.duplicate_of = duplicate_of
+
+
+class DuplicatePolicy(str, Enum):
+    REJECT = "reject"
+    FLAG = "flag"
+    ALLOW = "allow"
+
+
+DUPLICATE_POLICY = DuplicatePolicy(settings.CLAIM_DUPLICATE_POLICY)
+
+FINGERPRINT_FIELDS = {"patient_id", "provider_id", "service_date", "procedures"}
+VALIDATED_FIELDS = {"procedures", "total_amount"}
+REQUIRED_CLAIM_FIELDS = {
+    name for name, field in ClaimCreate.model_fields.items() if field.is_required()
+}
+
+# Columns added to claims after its first release. create_all never alters an
+# existing table, so startup adds whichever are missing; nullable columns
+# without defaults only touch the catalog.
+ADDED_CLAIM_COLUMNS = {
+    "fingerprint": "VARCHAR(64)",
+    "duplicate_of": "UUID",
+}
+
+
+async def ensure_claim_columns(conn: AsyncConnection) -> List[str]:
+    # Checked first because ALTER TABLE ... IF NOT EXISTS still takes an
+    # ACCESS EXCLUSIVE lock, which would queue traffic on every restart.
+    existing = set(
+        await conn.scalars(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'claims'"
+            )
+        )
+    )
+    missing = [name for name in ADDED_CLAIM_COLUMNS if name not in existing]
+    for name in missing:
+        await conn.execute(
+            text(
+                f"ALTER TABLE claims ADD COLUMN IF NOT EXISTS "
+                f"{name} {ADDED_CLAIM_COLUMNS[name]}"
+            )
+        )
+    return missing
+
+
+def claim_fingerprint(
+    patient_id: str,
+    provider_id: str,
+    service_date: date,
+    procedure_codes: Iterable[str],
+) -> str:
+    # Stored rows hand back service_date as a datetime; the API takes a date.
+    if isinstance(service_date, datetime):
+        service_date = service_date.date()
+    canonical = json.dumps(
+        [
+            patient_id.strip(),
+            provider_id.strip(),
+            service_date.isoformat(),
+            sorted(code.strip() for code in procedure_codes),
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def stored_claim_fingerprint(claim: Any) -> str:
+    return claim_fingerprint(
+        claim.patient_id,
+        claim.provider_id,
+        claim.service_date,
+        (procedure["code"] for procedure in claim.procedures),
+    )
+
+
+def _claim_row(claim_in: ClaimCreate, user_id: uuid.UUID) -> Dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "patient_id": claim_in.patient_id,
+        "provider_id": claim_in.provider_id,
+        "service_date": claim_in.service_date,
+        "procedures": [proc.dict() for proc in claim_in.procedures],
+        "total_amount": claim_in.total_amount,
+        "notes": claim_in.notes,
+        "status": ClaimStatus.SUBMITTED,
+        "fingerprint": claim_fingerprint(
+            claim_in.patient_id,
+            claim_in.provider_id,
+            claim_in.service_date,
+            (proc.code for proc in claim_in.procedures),
+        ),
+    }
+
+
+def _flag_duplicate(row: Dict[str, Any], duplicate_of: uuid.UUID) -> None:
+    # Flagged duplicates are stored for review but never enter the
+    # adjudication queue.
+    row["duplicate_of"] = duplicate_of
+    row["status"] = ClaimStatus.PENDING
+
+
+async def _find_duplicates(
+    db: AsyncSession, user_id: uuid.UUID, fingerprints: Iterable[str]
+) -> Dict[str, uuid.UUID]:
+    # Served from ix_claims_user_id_fingerprint; one probe for the whole set.
+    result = await db.execute(
+        select(Claim.fingerprint, Claim.id)
+        .where(Claim.user_id == user_id, Claim.fingerprint.in_(set(fingerprints)))
+        .order_by(Claim.fingerprint, Claim.created_at)
+        .distinct(Claim.fingerprint)
+    )
+    return dict(result.all())
 
 
 async def create_claim(
-    db: AsyncSession, claim_in: ClaimCreate, user_id: uuid.UUID
+    db: AsyncSession, claim_in: ClaimCreate, user_id: uuid.UUID, commit: bool = True
 ) -> Claim:
-    db_claim = Claim(
-        user_id=user_id,
-        patient_id=claim_in.patient_id,
-        provider_id=claim_in.provider_id,
-        service_date=claim_in.service_date,
-        procedures=[proc.dict() for proc in claim_in.procedures],
-        total_amount=claim_in.total_amount,
-        notes=claim_in.notes,
-        status=ClaimStatus.SUBMITTED,
+    with span("validation"):
+        errors = validate_claims([claim_in])[0]
+    if errors:
+        raise InvalidClaim(errors)
+
+    row = _claim_row(claim_in, user_id)
+    if DUPLICATE_POLICY != DuplicatePolicy.ALLOW:
+        duplicates = await _find_duplicates(db, user_id, [row["fingerprint"]])
+        duplicate_of = duplicates.get(row["fingerprint"])
+        if duplicate_of is not None:
+            if DUPLICATE_POLICY == DuplicatePolicy.REJECT:
+                raise DuplicateClaim(duplicate_of)
+            _flag_duplicate(row, duplicate_of)
+
+    # INSERT ... RETURNING hands back server defaults (created_at,
+    # updated_at) without a follow-up SELECT.
+    result = await db.scalars(insert(Claim).returning(Claim), [row])
+    db_claim = result.one()
+    if commit:
+        await db.commit()
+    mark_user_write(user_id)
+    return db_claim
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+def _check_batch(
+    items: List[Dict[str, Any]], user_id: uuid.UUID
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, Dict[str, Any]]]]:
+    results: List[Dict[str, Any]] = []
+    valid: List[Tuple[int, ClaimCreate]] = []
+
+    for index, item in enumerate(items):
+        try:
+            claim_in = ClaimCreate.model_validate(item)
+        except ValidationError as e:
+            results.append(
+                {
+                    "index": index,
+                    "success": False,
+                    "error": _format_validation_error(e),
+                }
+            )
+            continue
+        valid.append((index, claim_in))
+
+    # Reference checks run over the whole batch at once so that rejected
+    # claims never reach the insert or the adjudication queue.
+    candidates: List[Tuple[int, Dict[str, Any]]] = []
+    with span("validation"):
+        checks = validate_claims([claim_in for _, claim_in in valid])
+    for (index, claim_in), errors in zip(valid, checks):
+        if errors:
+            results.append({"index": index, "success": False, "error": errors})
+            continue
+        candidates.append((index, _claim_row(claim_in, user_id)))
+
+    return results, candidates
+
+
+async def _resolve_batch_duplicates(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    candidates: List[Tuple[int, Dict[str, Any]]],
+    results: List[Dict[str, Any]],
+) -> List[Tuple[int, Dict[str, Any]]]:
+    if not candidates or DUPLICATE_POLICY == DuplicatePolicy.ALLOW:
+        return candidates
+
+    duplicates = await _find_duplicates(
+        db, user_id, (row["fingerprint"] for _, row in candidates)
+    )
+    accepted: List[Tuple[int, Dict[str, Any]]] = []
+    for index, row in candidates:
+        duplicate_of = duplicates.get(row["fingerprint"])
+        if duplicate_of is None:
+            # Later copies within the same batch are duplicates of this one.
+            duplicates[row["fingerprint"]] = row["id"]
+        elif DUPLICATE_POLICY == DuplicatePolicy.REJECT:
+            results.append(
+                {
+                    "index": index,
+                    "success": False,
+                    "error": str(DuplicateClaim(duplicate_of)),
+                }
+            )
+            continue
+        else:
+            _flag_duplicate(row, duplicate_of)
+        accepted.append((index, row))
+    return accepted
+
+
+async def create_claims_batch(
+    db: AsyncSession,
+    items: List[Dict[str, Any]],
+    user_id: uuid.UUID,
+    atomic: bool = False,
+) -> List[Dict[str, Any]]:
+    results, candidates = _check_batch(items, user_id)
+    accepted = await _resolve_batch_duplicates(db, user_id, candidates, results)
+
+    if not accepted or (atomic and results):
+        return sorted(results, key=lambda r: r["index"])
+
+    # Rows are sent as one multi-row INSERT ... RETURNING per
+    # insertmanyvalues page, all inside a single transaction.
+    created = await db.scalars(
+        insert(Claim).returning(Claim, sort_by_parameter_order=True),
+        [row for _, row in accepted],
     )
-    db.add(db_claim)
     await db.commit()
-    await db.refresh(db_claim)
-    return db_claim
+    mark_user_write(user_id)
+
+    for (index, _), claim in zip(accepted, created.all()):
+        results.append({"index": index, "success": True, "claim": claim})
+
+    return sorted(results, key=lambda r: r["index"])
 
 
 async def get_claim(
@@ -38,21 +284,86 @@ async def get_claim(
 
 async def get_claim_status(
     db: AsyncSession, claim_id: uuid.UUID, user_id: uuid.UUID
-) -> Optional[Claim]:
+) -> Optional[Row]:
+    # Only the columns the status response needs; skips the procedures JSONB.
     result = await db.execute(
-        select(Claim).where(Claim.id == claim_id, Claim.user_id == user_id)
+        select(Claim.id, Claim.status, Claim.updated_at).where(
+            Claim.id == claim_id, Claim.user_id == user_id
+        )
     )
-    return result.scalars().first()
+    return result.first()
+
+
+async def _merged_claim(
+    db: AsyncSession,
+    claim_id: uuid.UUID,
+    user_id: uuid.UUID,
+    update_data: Dict[str, Any],
+) -> Optional[ClaimCreate]:
+    # A full replacement needs nothing from the stored row; otherwise the row
+    # stays locked until the UPDATE, so the checked claim is the one written.
+    values: Dict[str, Any] = {}
+    if not REQUIRED_CLAIM_FIELDS.issubset(update_data):
+        stored = (
+            await db.execute(
+                select(*(getattr(Claim, field) for field in ClaimCreate.model_fields))
+                .where(Claim.id == claim_id, Claim.user_id == user_id)
+                .with_for_update()
+            )
+        ).first()
+        if stored is None:
+            return None
+        values = stored._asdict()
+        values["service_date"] = values["service_date"].date()
+
+    values.update(update_data)
+    try:
+        return ClaimCreate.model_validate(values)
+    except ValidationError as e:
+        await db.rollback()
+        raise InvalidClaim(_format_validation_error(e))
+
+
+async def _check_update(
+    db: AsyncSession,
+    claim_id: uuid.UUID,
+    user_id: uuid.UUID,
+    update_data: Dict[str, Any],
+) -> bool:
+    merged = await _merged_claim(db, claim_id, user_id, update_data)
+    if merged is None:
+        return False
+
+    if VALIDATED_FIELDS.intersection(update_data):
+        with span("validation"):
+            errors = validate_claims([merged])[0]
+        if errors:
+            await db.rollback()
+            raise InvalidClaim(errors)
+
+    # Computed from the merged claim so the fingerprint goes out in the same
+    # UPDATE as the fields it covers.
+    if FINGERPRINT_FIELDS.intersection(update_data):
+        update_data["fingerprint"] = claim_fingerprint(
+            merged.patient_id,
+            merged.provider_id,
+            merged.service_date,
+            (proc.code for proc in merged.procedures),
+        )
+    return True
 
 
 async def update_claim(
     db: AsyncSession, claim_id: uuid.UUID, claim_in: ClaimUpdate, user_id: uuid.UUID
 ) -> Optional[Claim]:
-    claim = await get_claim(db, claim_id, user_id)
-    if not claim:
-        return None
-
     update_data = claim_in.dict(exclude_unset=True)
+    if not update_data:
+        return await get_claim(db, claim_id, user_id)
+
+    if (VALIDATED_FIELDS | FINGERPRINT_FIELDS).intersection(update_data):
+        if not await _check_update(db, claim_id, user_id, update_data):
+            await db.rollback()
+            return None
 
     if "procedures" in update_data and update_data["procedures"]:
         # Check if procedures are already dictionaries or objects with dict method
@@ -61,26 +372,97 @@ async def update_claim(
                 proc.dict() for proc in update_data["procedures"]
             ]
 
-    for field, value in update_data.items():
-        setattr(claim, field, value)
+    # One UPDATE ... RETURNING; the ownership check is part of the WHERE
+    # clause, so a missing or foreign claim simply returns no row.
+    returning = [Claim]
+    if "status" in update_data:
+        returning.append(status_notification())
+
+    result = await db.execute(
+        update(Claim)
+        .where(Claim.id == claim_id, Claim.user_id == user_id)
+        .values(**update_data)
+        .returning(*returning),
+        execution_options={"synchronize_session": False},
+    )
+    row = result.first()
+    if row is None:
+        await db.rollback()
+        return None
 
     await db.commit()
-    await db.refresh(claim)
-    return claim
+    mark_user_write(user_id)
+    return row[0]
 
 
 async def delete_claim(
     db: AsyncSession, claim_id: uuid.UUID, user_id: uuid.UUID
 ) -> bool:
-    claim = await get_claim(db, claim_id, user_id)
-    if not claim:
+    deleted_id = await db.scalar(
+        delete(Claim)
+        .where(Claim.id == claim_id, Claim.user_id == user_id)
+        .returning(Claim.id),
+        execution_options={"synchronize_session": False},
+    )
+    if deleted_id is None:
+        await db.rollback()
         return False
 
-    await db.delete(claim)
     await db.commit()
+    mark_user_write(user_id)
     return True
 
 
-async def get_user_claims(db: AsyncSession, user_id: uuid.UUID) -> List[Claim]:
-    result = await db.execute(select(Claim).where(Claim.user_id == user_id))
-    return result.scalars().all()
+def encode_claim_cursor(claim: Claim) -> str:
+    raw = json.dumps([claim.created_at.isoformat(), str(claim.id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_claim_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, claim_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(claim_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def get_user_claims(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Claim], Optional[str]]:
+    # Keyset pagination over (created_at, id), newest first, served by
+    # ix_claims_user_id_created_at_id so every page is a bounded index range.
+    query = select(Claim).where(Claim.user_id == user_id)
+    if cursor:
+        created_at, claim_id = decode_claim_cursor(cursor)
+        query = query.where(
+            tuple_(Claim.created_at, Claim.id) < tuple_(created_at, claim_id)
+        )
+    query = query.order_by(Claim.created_at.desc(), Claim.id.desc()).limit(limit + 1)
+
+    result = await db.execute(query)
+    claims = result.scalars().all()
+
+    next_cursor = None
+    if len(claims) > limit:
+        claims = claims[:limit]
+        next_cursor = encode_claim_cursor(claims[-1])
+    return claims, next_cursor
+
+
+async def stream_user_claims(
+    db: AsyncSession, user_id: uuid.UUID, chunk_size: int
+) -> AsyncIterator[List[Claim]]:
+    # stream() runs the query on a server-side cursor, so only one chunk of
+    # rows is held in memory at a time.
+    result = await db.stream(
+        select(Claim)
+        .where(Claim.user_id == user_id)
+        .order_by(Claim.created_at, Claim.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for partition in result.scalars().partitions():
+        yield partition
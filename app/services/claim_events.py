@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import asyncpg
+import structlog
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.claim import Claim
+from app.monitoring.metrics import (
+    claim_status_events_dropped_total,
+    claim_status_fanout_latency_seconds,
+    claim_status_subscribers,
+)
+
+logger = structlog.get_logger("claim_events")
+
+
+def status_notification():
+    # pg_notify() over the claims row being read or written, usable in a
+    # SELECT or in an UPDATE ... RETURNING so the notification costs no extra
+    # round trip. NOTIFY is transactional: subscribers only hear about a
+    # change once it commits.
+    payload = func.json_build_object(
+        "id",
+        Claim.id,
+        "user_id",
+        Claim.user_id,
+        "status",
+        func.lower(cast(Claim.status, Text)),
+        "updated_at",
+        Claim.updated_at,
+        "sent_at",
+        time.time(),
+    )
+    return func.pg_notify(settings.CLAIM_STATUS_CHANNEL, cast(payload, Text))
+
+
+async def publish_status_changes(db: AsyncSession, claim_ids: List[uuid.UUID]) -> None:
+    await db.execute(select(status_notification()).where(Claim.id.in_(claim_ids)))
+
+
+# One LISTEN connection per worker process, fanned out to per-user queues.
+class ClaimStatusHub:
+    def __init__(self, dsn: str, channel: str, queue_size: int):
+        self.dsn = dsn
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: uuid.UUID) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[str(user_id)].add(queue)
+        claim_status_subscribers.inc()
+        return queue
+
+    def unsubscribe(self, user_id: uuid.UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(str(user_id))
+        if queues is None or queue not in queues:
+            return
+
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[str(user_id)]
+        claim_status_subscribers.dec()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        backoff = 1
+        while True:
+            closed = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                self._connection.add_termination_listener(lambda _: closed.set())
+                await self._connection.add_listener(self.channel, self._on_notify)
+                backoff = 1
+                await closed.wait()
+                logger.warning("claim_status_listener_disconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("claim_status_listener_error", error=str(e))
+            finally:
+                if self._connection is not None and not self._connection.is_closed():
+                    await self._connection.close()
+                self._connection = None
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("claim_status_invalid_payload", payload=payload)
+            return
+
+        sent_at = event.pop("sent_at", None)
+        queues = self._subscribers.get(event.pop("user_id", None))
+        if not queues:
+            return
+
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                claim_status_events_dropped_total.inc()
+
+        if sent_at is not None:
+            claim_status_fanout_latency_seconds.observe(max(0, time.time() - sent_at))
+
+
+claim_status_hub = ClaimStatusHub(
+    settings.ASYNCPG_DSN,
+    settings.CLAIM_STATUS_CHANNEL,
+    settings.SSE_SUBSCRIBER_QUEUE_SIZE,
+)
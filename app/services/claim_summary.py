@@ -0,0 +1,129 @@
+import uuid
+from datetime import date, datetime, time, timezone
+from typing import List, Optional
+
+from sqlalchemy import (
+    Date,
+    and_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.claim import Claim
+from app.models.claim_summary import ClaimSummary
+
+SUMMARY_KEYS = ("user_id", "day", "provider_id", "status")
+
+
+def _expected_summaries(since: Optional[date] = None):
+    day = cast(func.timezone(literal_column("'UTC'"), Claim.created_at), Date)
+    query = select(
+        Claim.user_id,
+        day.label("day"),
+        Claim.provider_id,
+        Claim.status,
+        func.count().label("claim_count"),
+        func.sum(Claim.total_amount).label("total_amount"),
+    ).group_by(Claim.user_id, day, Claim.provider_id, Claim.status)
+    if since is not None:
+        # On created_at itself so older partitions are pruned.
+        query = query.where(
+            Claim.created_at >= datetime.combine(since, time(), timezone.utc)
+        )
+    return query
+
+
+async def get_claim_summary(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    provider_id: Optional[str] = None,
+) -> List[Row]:
+    query = select(
+        ClaimSummary.day,
+        ClaimSummary.provider_id,
+        ClaimSummary.status,
+        ClaimSummary.claim_count,
+        ClaimSummary.total_amount,
+    ).where(ClaimSummary.user_id == user_id, ClaimSummary.claim_count > 0)
+    if date_from is not None:
+        query = query.where(ClaimSummary.day >= date_from)
+    if date_to is not None:
+        query = query.where(ClaimSummary.day <= date_to)
+    if provider_id is not None:
+        query = query.where(ClaimSummary.provider_id == provider_id)
+
+    result = await db.execute(
+        query.order_by(ClaimSummary.day, ClaimSummary.provider_id, ClaimSummary.status)
+    )
+    return result.all()
+
+
+# Summaries outlive archived claim partitions, so both checks only look at
+# days from `since` (the oldest attached partition) onwards.
+async def find_summary_drift(
+    db: AsyncSession, limit: Optional[int] = None, since: Optional[date] = None
+) -> List[Row]:
+    expected = _expected_summaries(since).subquery("expected")
+    stored = select(ClaimSummary).where(
+        or_(ClaimSummary.claim_count != 0, ClaimSummary.total_amount != 0)
+    )
+    if since is not None:
+        stored = stored.where(ClaimSummary.day >= since)
+    stored = stored.subquery("stored")
+    query = (
+        select(
+            *(
+                func.coalesce(stored.c[key], expected.c[key]).label(key)
+                for key in SUMMARY_KEYS
+            ),
+            func.coalesce(stored.c.claim_count, 0).label("stored_count"),
+            func.coalesce(expected.c.claim_count, 0).label("expected_count"),
+            func.coalesce(stored.c.total_amount, 0).label("stored_amount"),
+            func.coalesce(expected.c.total_amount, 0).label("expected_amount"),
+        )
+        .select_from(
+            stored.join(
+                expected,
+                and_(*(stored.c[key] == expected.c[key] for key in SUMMARY_KEYS)),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                func.coalesce(stored.c.claim_count, 0)
+                != func.coalesce(expected.c.claim_count, 0),
+                func.coalesce(stored.c.total_amount, 0)
+                != func.coalesce(expected.c.total_amount, 0),
+            )
+        )
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return result.all()
+
+
+async def rebuild_summaries(db: AsyncSession, since: Optional[date] = None) -> int:
+    # SHARE mode blocks claim writes (and so the summary triggers) for the
+    # duration of the rebuild while still allowing reads.
+    await db.execute(text("LOCK TABLE claims IN SHARE MODE"))
+    stale = delete(ClaimSummary)
+    if since is not None:
+        stale = stale.where(ClaimSummary.day >= since)
+    await db.execute(stale)
+    result = await db.execute(
+        insert(ClaimSummary).from_select(
+            [*SUMMARY_KEYS, "claim_count", "total_amount"], _expected_summaries(since)
+        )
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+# (user_id, key) -> (request_hash, status_code, response_body) for completed
+# requests, so retries in the same worker skip the database entirely.
+_response_cache = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+)
+
+
+class IdempotencyKeyMismatch(Exception):
+    pass
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _replay(stored: Tuple[str, int, Any], request_hash: str) -> Tuple[int, Any, bool]:
+    stored_hash, status_code, body = stored
+    if stored_hash != request_hash:
+        raise IdempotencyKeyMismatch(
+            "Idempotency-Key was already used with a different request"
+        )
+    return status_code, body, True
+
+
+async def _claim_key(
+    db: AsyncSession, user_id: uuid.UUID, key: str, request_hash: str
+) -> Optional[Tuple[str, int, Any]]:
+    # The key row is inserted in the same transaction as the operation. A
+    # concurrent request with the same key blocks on the unique index until
+    # this transaction commits, then finds the stored response instead of
+    # repeating the work. Returns None once this transaction owns the key.
+    while True:
+        claimed = await db.scalar(
+            insert(IdempotencyKey)
+            .values(user_id=user_id, key=key, request_hash=request_hash)
+            .on_conflict_do_nothing()
+            .returning(IdempotencyKey.key)
+        )
+        if claimed is not None:
+            return None
+
+        record = await db.get(IdempotencyKey, (user_id, key))
+        await db.rollback()
+        if record is not None:
+            return record.request_hash, record.status_code, record.response_body
+        # The worker's TTL cleanup deleted the expired row between the INSERT
+        # and the read, so the key is free again; the next INSERT inserts a
+        # fresh row, which cleanup leaves alone.
+
+
+async def execute_idempotent(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    key: str,
+    request_hash: str,
+    operation: Callable[[AsyncSession], Awaitable[Any]],
+    status_code: int,
+) -> Tuple[int, Any, bool]:
+    cache_key = (str(user_id), key)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return _replay(cached, request_hash)
+
+    stored = await _claim_key(db, user_id, key, request_hash)
+    if stored is not None:
+        _response_cache.set(cache_key, stored)
+        return _replay(stored, request_hash)
+
+    body = await operation(db)
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+    )
+    await db.commit()
+
+    _response_cache.set(cache_key, (request_hash, status_code, body))
+    return status_code, body, False
@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex
+
+from app.models.claim import Claim
+from app.services.partitions import is_partitioned
+
+logger = structlog.get_logger("indexes")
+
+# create_all only builds these together with the claims table, so databases
+# that predate an index get it from python -m app.indexes.
+CLAIM_INDEXES = {index.name: index for index in Claim.__table__.indexes}
+
+
+async def claim_index_validity(conn: AsyncConnection) -> Dict[str, bool]:
+    result = await conn.execute(
+        text(
+            "SELECT c.relname, i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = to_regclass('claims') AND c.relname = ANY(:names)"
+        ),
+        {"names": list(CLAIM_INDEXES)},
+    )
+    return dict(result.all())
+
+
+async def missing_claim_indexes(conn: AsyncConnection) -> List[str]:
+    validity = await claim_index_validity(conn)
+    return [name for name in CLAIM_INDEXES if not validity.get(name)]
+
+
+async def create_claim_index(conn: AsyncConnection, name: str) -> bool:
+    # conn must be in AUTOCOMMIT mode: CONCURRENTLY cannot run inside a
+    # transaction block. Partitioned tables don't support it, but they are
+    # created with every index already.
+    concurrently = "" if await is_partitioned(conn) else "CONCURRENTLY "
+    validity = await claim_index_validity(conn)
+    if validity.get(name):
+        return False
+    if name in validity:
+        # A failed concurrent build leaves an invalid index behind, which
+        # IF NOT EXISTS would otherwise keep.
+        await conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+    statement = str(
+        CreateIndex(CLAIM_INDEXES[name], if_not_exists=True).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    await conn.execute(
+        text(statement.replace("CREATE INDEX ", f"CREATE INDEX {concurrently}", 1))
+    )
+    logger.info("claim_index_created", index=name)
+    return True
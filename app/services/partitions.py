@@ -0,0 +1,183 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, NamedTuple, Optional
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = structlog.get_logger("partitions")
+
+PARTITION_NAME = re.compile(r"^claims_p(\d{4})_(\d{2})$")
+DEFAULT_PARTITION = "claims_default"
+
+
+class Partition(NamedTuple):
+    name: str
+    start: date
+    end: date
+    attached: bool
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# Partitions follow UTC months, whatever the host's local timezone is.
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def partition_name(start: date) -> str:
+    return f"claims_p{start.year:04d}_{start.month:02d}"
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    return bool(
+        await conn.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass('claims'))"
+            )
+        )
+    )
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Partition]:
+    # Detached partitions are listed too, so an archive run that stopped
+    # half way is picked up again on the next run.
+    result = await conn.execute(
+        text(
+            "SELECT c.relname, EXISTS ("
+            "  SELECT 1 FROM pg_inherits i"
+            "  WHERE i.inhrelid = c.oid AND i.inhparent = to_regclass('claims')"
+            ") AS attached "
+            "FROM pg_class c "
+            "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace "
+            "AND c.relname ~ '^claims_p[0-9]{4}_[0-9]{2}$'"
+        )
+    )
+    partitions = []
+    for name, attached in result.all():
+        match = PARTITION_NAME.match(name)
+        start = date(int(match.group(1)), int(match.group(2)), 1)
+        partitions.append(Partition(name, start, month_start(start, 1), attached))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+async def oldest_partition_start(conn: AsyncConnection) -> Optional[date]:
+    if not await is_partitioned(conn):
+        return None
+    attached = [p for p in await list_partitions(conn) if p.attached]
+    return attached[0].start if attached else None
+
+
+async def _create_partition(conn: AsyncConnection, start: date) -> None:
+    # Bounds are pinned to UTC so partitions line up with the UTC days used
+    # by the claim summaries.
+    name = partition_name(start)
+    lower = f"'{start.isoformat()} 00:00:00+00'"
+    upper = f"'{month_start(start, 1).isoformat()} 00:00:00+00'"
+    in_range = f"created_at >= {lower} AND created_at < {upper}"
+
+    stranded = await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})")
+    )
+    if not stranded:
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF claims "
+                f"FOR VALUES FROM ({lower}) TO ({upper})"
+            )
+        )
+        return
+
+    # Claims written while this month had no partition landed in the default
+    # one; Postgres refuses the new partition until they are moved out.
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE claims INCLUDING ALL)"))
+    moved = await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE claims ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({lower}) TO ({upper})"
+        )
+    )
+    logger.warning("claim_partition_rows_moved", partition=name, rows=moved.rowcount)
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, months_ahead: int, today: Optional[date] = None
+) -> List[str]:
+    # Serializes concurrent callers (several app workers starting at once).
+    await conn.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext('claims_partitions'))")
+    )
+    # Catches claims dated past the last monthly partition, so inserts keep
+    # working if maintenance stops running.
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF claims DEFAULT"
+        )
+    )
+    current = month_start(today or utc_today())
+    existing = {partition.name for partition in await list_partitions(conn)}
+    created = []
+    for offset in range(months_ahead + 1):
+        start = month_start(current, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        await _create_partition(conn, start)
+        created.append(name)
+        logger.info("claim_partition_created", partition=name)
+    return created
+
+
+async def detach_partition(conn: AsyncConnection, partition: Partition) -> None:
+    await conn.execute(text(f"ALTER TABLE claims DETACH PARTITION {partition.name}"))
+    logger.info("claim_partition_detached", partition=partition.name)
+
+
+async def archive_partition(
+    conn: AsyncConnection, partition: Partition, archive_dir: str
+) -> str:
+    # The file is written under a temporary name and only renamed once the
+    # copied row count matches, so a partition is never dropped without a
+    # complete archive next to it.
+    path = os.path.join(archive_dir, f"{partition.name}.csv.gz")
+    partial = f"{path}.partial"
+    expected = await conn.scalar(text(f"SELECT count(*) FROM {partition.name}"))
+
+    raw = await conn.get_raw_connection()
+    with open(partial, "wb") as archive_file:
+        with gzip.GzipFile(fileobj=archive_file, mode="wb") as archive:
+
+            async def write(chunk: bytes) -> None:
+                archive.write(chunk)
+
+            status = await raw.driver_connection.copy_from_table(
+                partition.name, output=write, format="csv", header=True
+            )
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+
+    copied = int(status.split()[-1])
+    if copied != expected:
+        raise RuntimeError(
+            f"Archived {copied} of {expected} rows from {partition.name}"
+        )
+    os.replace(partial, path)
+
+    await conn.execute(text(f"DROP TABLE {partition.name}"))
+    logger.info(
+        "claim_partition_archived", partition=partition.name, rows=copied, path=path
+    )
+    return path
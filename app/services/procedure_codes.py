@@ -0,0 +1,171 @@
+import asyncio
+import csv
+import os
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Iterable, List, Optional, Sequence
+
+import structlog
+
+from app.core.config import settings
+from app.monitoring.metrics import claim_validation_rejections_total
+from app.schemas.claim import ClaimCreate
+
+logger = structlog.get_logger("procedure_codes")
+
+
+def _to_cents(amount) -> int:
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+class ProcedureCodeIndex:
+    # Codes are kept as one sorted tuple with the fee ranges (in cents) in
+    # parallel arrays, so a large code table stays a few compact objects
+    # instead of a dict entry per code.
+    __slots__ = ("codes", "code_set", "min_cents", "max_cents", "mtime")
+
+    def __init__(self, rows: Iterable[Sequence], mtime: float = 0.0):
+        ordered = sorted(rows, key=lambda row: row[0])
+        self.codes = tuple(row[0] for row in ordered)
+        if len(set(self.codes)) != len(self.codes):
+            raise ValueError("Duplicate procedure codes in reference table")
+        self.code_set = frozenset(self.codes)
+        self.min_cents = array("q", (_to_cents(row[1]) for row in ordered))
+        self.max_cents = array("q", (_to_cents(row[2]) for row in ordered))
+        for code, low, high in zip(self.codes, self.min_cents, self.max_cents):
+            if low > high:
+                raise ValueError(f"Invalid fee range for procedure code '{code}'")
+        self.mtime = mtime
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def fee_range(self, code: str) -> Optional[tuple]:
+        position = bisect_left(self.codes, code)
+        if position == len(self.codes) or self.codes[position] != code:
+            return None
+        return self.min_cents[position], self.max_cents[position]
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ProcedureCodeIndex":
+        mtime = os.stat(path).st_mtime
+        with open(path, newline="") as f:
+            rows = [
+                (row["code"].strip(), row["min_amount"], row["max_amount"])
+                for row in csv.DictReader(f)
+            ]
+        return cls(rows, mtime)
+
+
+_index: Optional[ProcedureCodeIndex] = None
+
+
+def get_procedure_index() -> Optional[ProcedureCodeIndex]:
+    return _index
+
+
+def load_procedure_codes(path: str = settings.PROCEDURE_CODES_PATH) -> None:
+    global _index
+    if not path:
+        return
+    try:
+        _index = ProcedureCodeIndex.from_csv(path)
+    except (OSError, ValueError, KeyError, ArithmeticError) as e:
+        # Startup carries on without code validation; the watcher loads the
+        # table once the file becomes readable.
+        logger.error(
+            "procedure_codes_load_failed",
+            path=path,
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return
+    logger.info("procedure_codes_loaded", path=path, codes=len(_index))
+
+
+async def reload_procedure_codes(path: str = settings.PROCEDURE_CODES_PATH) -> bool:
+    global _index
+    try:
+        mtime = os.stat(path).st_mtime
+        if _index is not None and mtime == _index.mtime:
+            return False
+        index = await asyncio.to_thread(ProcedureCodeIndex.from_csv, path)
+    except (OSError, ValueError, KeyError, ArithmeticError) as e:
+        # A bad edit keeps the last good table in service.
+        logger.error(
+            "procedure_codes_reload_failed",
+            path=path,
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return False
+
+    # A single assignment, so in-flight validations keep the index they
+    # started with.
+    _index = index
+    logger.info("procedure_codes_reloaded", path=path, codes=len(index))
+    return True
+
+
+async def watch_procedure_codes(
+    path: str = settings.PROCEDURE_CODES_PATH,
+    interval: float = settings.PROCEDURE_CODES_RELOAD_SECONDS,
+) -> None:
+    if not path:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        await reload_procedure_codes(path)
+
+
+# Returns one entry per claim: None when it passes, otherwise its errors in
+# the same "location: message" form as schema validation errors.
+def validate_claims(claims: Sequence[ClaimCreate]) -> List[Optional[str]]:
+    index = _index
+    errors: List[List[str]] = [[] for _ in claims]
+
+    # Flatten the batch once and resolve each distinct code once, rather than
+    # looking codes up claim by claim.
+    owners, positions, codes, cents = [], [], [], []
+    for owner, claim in enumerate(claims):
+        for position, procedure in enumerate(claim.procedures):
+            owners.append(owner)
+            positions.append(position)
+            codes.append(procedure.code)
+            cents.append(_to_cents(procedure.amount))
+
+    if index is not None:
+        distinct = set(codes)
+        unknown = distinct - index.code_set
+        ranges = {code: index.fee_range(code) for code in distinct - unknown}
+
+        for owner, position, code, amount in zip(owners, positions, codes, cents):
+            if code in unknown:
+                claim_validation_rejections_total.labels(reason="unknown_code").inc()
+                errors[owner].append(
+                    f"procedures.{position}.code: Unknown procedure code '{code}'"
+                )
+                continue
+            low, high = ranges[code]
+            if not low <= amount <= high:
+                claim_validation_rejections_total.labels(
+                    reason="amount_out_of_range"
+                ).inc()
+                errors[owner].append(
+                    f"procedures.{position}.amount: Amount for '{code}' must be "
+                    f"between {low / 100:.2f} and {high / 100:.2f}"
+                )
+
+    totals = [0] * len(claims)
+    for owner, amount in zip(owners, cents):
+        totals[owner] += amount
+    for owner, claim in enumerate(claims):
+        if totals[owner] != _to_cents(claim.total_amount):
+            claim_validation_rejections_total.labels(reason="total_mismatch").inc()
+            errors[owner].append(
+                f"total_amount: Must equal the sum of procedure amounts "
+                f"({totals[owner] / 100:.2f})"
+            )
+
+    return ["; ".join(claim_errors) or None for claim_errors in errors]
@@ -8,8 +8,8 @@ from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_refresh_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
 )
 from app.models.user import User
 from app.schemas.user import UserCreate
@@ -19,7 +19,7 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     db_user = User(
         username=user_in.username,
         full_name=user_in.full_name,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=await get_password_hash_async(user_in.password),
     )
     db.add(db_user)
     await db.commit()
@@ -35,7 +35,7 @@ async def authenticate_user(
 
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
 
     return user
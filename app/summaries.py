@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import sys
+
+import structlog
+
+from app.db.base import Base, async_session, engine
+from app.models.claim_summary import ClaimSummary
+from app.models.user import User  # noqa: F401  (resolves Claim.user)
+from app.monitoring.logging import setup_logging, shutdown_logging
+from app.services.claim_summary import find_summary_drift, rebuild_summaries
+from app.services.partitions import oldest_partition_start
+
+logger = structlog.get_logger("summaries")
+
+
+async def verify(limit: int) -> int:
+    async with async_session() as db:
+        since = await oldest_partition_start(await db.connection())
+        drift = await find_summary_drift(db, limit, since)
+
+    for row in drift:
+        logger.warning(
+            "claim_summary_drift",
+            user_id=str(row.user_id),
+            day=row.day.isoformat(),
+            provider_id=row.provider_id,
+            status=row.status.value,
+            stored_count=row.stored_count,
+            expected_count=row.expected_count,
+            stored_amount=str(row.stored_amount),
+            expected_amount=str(row.expected_amount),
+        )
+    logger.info("claim_summary_verified", drifted_buckets=len(drift))
+    return 1 if drift else 0
+
+
+async def rebuild() -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[ClaimSummary.__table__])
+
+    async with async_session() as db:
+        since = await oldest_partition_start(await db.connection())
+        buckets = await rebuild_summaries(db, since)
+    logger.info(
+        "claim_summary_rebuilt",
+        buckets=buckets,
+        since=since.isoformat() if since else None,
+    )
+    return 0
+
+
+async def run(command: str, limit: int) -> int:
+    try:
+        if command == "rebuild":
+            return await rebuild()
+        return await verify(limit)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify or rebuild the claim summary aggregates"
+    )
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=100,
+        help="Maximum drifted buckets reported by verify",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        exit_code = asyncio.run(run(args.command, args.limit))
+    finally:
+        shutdown_logging()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
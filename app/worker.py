@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import importlib
+import inspect
+import signal
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import delete, func, select, update
+
+from app.core.config import settings
+from app.db.base import async_session, engine
+from app.models.claim import Claim, ClaimStatus
+from app.models.idempotency import IdempotencyKey
+from app.models.user import User  # noqa: F401  (resolves Claim.user)
+from app.monitoring.logging import setup_logging, shutdown_logging
+from app.monitoring.metrics import (
+    claim_processing_total,
+    claims_queue_backlog,
+    start_metrics_server,
+    worker_batch_duration_seconds,
+    worker_batch_size,
+    worker_claims_failed_total,
+)
+from app.services.claim_events import publish_status_changes, status_notification
+
+logger = structlog.get_logger("worker")
+
+
+def load_decision_function(path: str) -> Callable:
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+async def claim_batch(batch_size: int) -> List[Claim]:
+    # SKIP LOCKED lets any number of workers pull disjoint batches without
+    # waiting on each other; the PROCESSING update is committed right away so
+    # the row locks are only held for this one statement.
+    queued = (
+        select(Claim.id)
+        .where(Claim.status == ClaimStatus.SUBMITTED)
+        .order_by(Claim.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    async with async_session() as db:
+        result = await db.scalars(
+            update(Claim)
+            .where(Claim.id.in_(queued))
+            .values(status=ClaimStatus.PROCESSING)
+            .returning(Claim),
+            execution_options={"synchronize_session": False},
+        )
+        claims = result.all()
+        if claims:
+            await publish_status_changes(db, [claim.id for claim in claims])
+        await db.commit()
+    return claims
+
+
+async def decide_claims(
+    claims: List[Claim], decide: Callable, concurrency: int
+) -> List[Tuple[Claim, ClaimStatus]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def decide_one(claim: Claim) -> Tuple[Claim, ClaimStatus]:
+        async with semaphore:
+            try:
+                decision = decide(claim)
+                if inspect.isawaitable(decision):
+                    decision = await decision
+                return claim, ClaimStatus(decision)
+            except Exception as e:
+                # Parked for manual review instead of being retried forever.
+                logger.error(
+                    "claim_decision_failed",
+                    claim_id=str(claim.id),
+                    error=str(e),
+                    error_type=type(e).__name__,
+                )
+                worker_claims_failed_total.inc()
+                return claim, ClaimStatus.PENDING
+
+    return await asyncio.gather(*(decide_one(claim) for claim in claims))
+
+
+async def write_results(results: List[Tuple[Claim, ClaimStatus]]) -> None:
+    claims_by_status = defaultdict(list)
+    for claim, status in results:
+        claims_by_status[status].append(claim.id)
+
+    # Claims that left PROCESSING meanwhile (requeued after their lease ran
+    # out, or edited by their owner) match no row; only the rows actually
+    # written are notified and counted.
+    written = {}
+    async with async_session() as db:
+        for status, claim_ids in claims_by_status.items():
+            result = await db.execute(
+                update(Claim)
+                .where(Claim.id.in_(claim_ids), Claim.status == ClaimStatus.PROCESSING)
+                .values(status=status)
+                .returning(Claim.id, status_notification()),
+                execution_options={"synchronize_session": False},
+            )
+            written[status] = len(result.all())
+        await db.commit()
+
+    for status, count in written.items():
+        claim_processing_total.labels(status=status.value).inc(count)
+
+
+async def process_batch(decide: Callable, batch_size: int, concurrency: int) -> int:
+    started = time.perf_counter()
+    claims = await claim_batch(batch_size)
+    if not claims:
+        return 0
+
+    results = await decide_claims(claims, decide, concurrency)
+    await write_results(results)
+
+    worker_batch_size.observe(len(claims))
+    worker_batch_duration_seconds.observe(time.perf_counter() - started)
+    logger.info(
+        "claim_batch_processed",
+        claims=len(claims),
+        duration_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+    return len(claims)
+
+
+async def run_maintenance() -> None:
+    async with async_session() as db:
+        # Claims left in PROCESSING by a worker that died mid-batch go back
+        # to the queue once their lease expires.
+        requeued = await db.execute(
+            update(Claim)
+            .where(
+                Claim.status == ClaimStatus.PROCESSING,
+                Claim.updated_at
+                < func.now() - timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+            )
+            .values(status=ClaimStatus.SUBMITTED),
+            execution_options={"synchronize_session": False},
+        )
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.created_at
+                < func.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+            )
+        )
+        backlog = await db.scalar(
+            select(func.count())
+            .select_from(Claim)
+            .where(Claim.status == ClaimStatus.SUBMITTED)
+        )
+        await db.commit()
+
+    claims_queue_backlog.set(backlog)
+    if requeued.rowcount:
+        logger.warning("claims_requeued", claims=requeued.rowcount)
+
+
+async def _wait_for_work(stop: asyncio.Event) -> None:
+    try:
+        await asyncio.wait_for(stop.wait(), settings.WORKER_POLL_INTERVAL_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run(
+    batch_size: int, concurrency: int, once: bool, stop: Optional[asyncio.Event] = None
+) -> None:
+    decide = load_decision_function(settings.WORKER_DECISION_FUNCTION)
+    stop = stop or asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info(
+        "worker_started",
+        batch_size=batch_size,
+        concurrency=concurrency,
+        decision_function=settings.WORKER_DECISION_FUNCTION,
+    )
+
+    next_maintenance = 0.0
+    try:
+        while not stop.is_set():
+            try:
+                if time.monotonic() >= next_maintenance:
+                    await run_maintenance()
+                    next_maintenance = (
+                        time.monotonic() + settings.WORKER_BACKLOG_INTERVAL_SECONDS
+                    )
+                processed = await process_batch(decide, batch_size, concurrency)
+            except Exception as e:
+                logger.error(
+                    "claim_batch_failed", error=str(e), error_type=type(e).__name__
+                )
+                processed = 0
+
+            if processed < batch_size:
+                if once:
+                    break
+                await _wait_for_work(stop)
+    finally:
+        logger.info("worker_stopped")
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adjudicate submitted claims")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.WORKER_BATCH_SIZE,
+        help="Claims claimed per batch",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Decisions evaluated concurrently within a batch",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit once the queue is drained instead of polling",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    if not start_metrics_server(settings.WORKER_METRICS_PORT):
+        logger.warning("Metrics port unavailable", port=settings.WORKER_METRICS_PORT)
+    try:
+        asyncio.run(run(args.batch_size, args.concurrency, args.once))
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Compare per-claim response serialization cost.
+
+Three paths are measured on the same in-memory claims:
+
+* legacy: response_model validation + stdlib json (the old default)
+* response_model: response_model validation + the orjson default response
+* trusted: dump_claim() + the orjson default response
+
+Run from the repository root:
+
+    python -m benchmarks.claim_serialization -n 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import APIJSONResponse
+from app.models.claim import Claim, ClaimStatus
+from app.models.user import User  # noqa: F401  (resolves Claim.user)
+from app.schemas.claim import ClaimInDB, dump_claim
+
+CLAIM_FIELD = create_response_field(name="Response_Claim", type_=ClaimInDB)
+
+
+def make_claims(count):
+    """Build transient Claim rows shaped like what asyncpg hands back."""
+    now = datetime.now(timezone.utc)
+    return [
+        Claim(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            patient_id=f"PAT-{i:06d}",
+            provider_id="PRV-000123",
+            service_date=(now - timedelta(days=i % 90)).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ),
+            procedures=[
+                {"code": "99213", "amount": 125.5, "description": "Office visit"},
+                {"code": "85025", "amount": 32.25, "description": "Blood count"},
+            ],
+            total_amount=Decimal("157.75"),
+            status=ClaimStatus.SUBMITTED,
+            notes=None if i % 2 else "Follow-up in two weeks",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+async def legacy(claim):
+    content = await serialize_response(field=CLAIM_FIELD, response_content=claim)
+    return JSONResponse(content).body
+
+
+async def response_model(claim):
+    content = await serialize_response(field=CLAIM_FIELD, response_content=claim)
+    return APIJSONResponse(content).body
+
+
+async def trusted(claim):
+    return APIJSONResponse(dump_claim(claim)).body
+
+
+PATHS = {"legacy": legacy, "response_model": response_model, "trusted": trusted}
+
+
+async def measure(render, claims, iterations):
+    """Return mean microseconds per serialized claim."""
+    started = time.perf_counter()
+    for i in range(iterations):
+        await render(claims[i % len(claims)])
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def main_async(iterations):
+    claims = make_claims(1000)
+
+    # Every path must produce the same document, otherwise the timings
+    # compare different work.
+    for claim in claims:
+        reference = json.loads(await legacy(claim))
+        for name, render in PATHS.items():
+            assert json.loads(await render(claim)) == reference, name
+
+    for render in PATHS.values():
+        await measure(render, claims, min(2000, iterations))
+
+    report = {
+        name: {"us_per_claim": round(await measure(render, claims, iterations), 2)}
+        for name, render in PATHS.items()
+    }
+    baseline = report["legacy"]["us_per_claim"]
+    for result in report.values():
+        result["speedup"] = round(baseline / result["us_per_claim"], 2)
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark claim serialization")
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=20000,
+        help="Claims serialized per path",
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
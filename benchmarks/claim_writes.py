@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Compare claim write latency before and after the RETURNING rework.
+
+Needs the Postgres database from the app settings (POSTGRES_* variables).
+A throwaway user is created for the run and removed afterwards.
+
+    python -m benchmarks.claim_writes -n 500 -o claim_writes.json
+
+Results are keyed <implementation>_<operation> (e.g. returning_create) in
+the same report format as benchmarks.micro, so benchmarks.compare can diff
+two runs.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.db.base import Base, async_session, engine
+from app.models.claim import Claim, ClaimStatus
+from app.models.user import User
+from app.schemas.claim import ClaimCreate, ClaimUpdate, Procedure
+from app.services.claim import (
+    create_claim,
+    delete_claim,
+    ensure_claim_columns,
+    get_claim,
+    update_claim,
+)
+from app.services.partitions import ensure_partitions, is_partitioned
+from benchmarks.stats import run_metadata, summarize
+
+
+async def legacy_create_claim(db, claim_in, user_id):
+    """INSERT + COMMIT + refresh() SELECT, as the service used to do."""
+    db_claim = Claim(
+        user_id=user_id,
+        patient_id=claim_in.patient_id,
+        provider_id=claim_in.provider_id,
+        service_date=claim_in.service_date,
+        procedures=[proc.dict() for proc in claim_in.procedures],
+        total_amount=claim_in.total_amount,
+        notes=claim_in.notes,
+        status=ClaimStatus.SUBMITTED,
+    )
+    db.add(db_claim)
+    await db.commit()
+    await db.refresh(db_claim)
+    return db_claim
+
+
+async def legacy_update_claim(db, claim_id, claim_in, user_id):
+    """SELECT, then UPDATE + COMMIT + refresh() SELECT."""
+    claim = await get_claim(db, claim_id, user_id)
+    if not claim:
+        return None
+    for field, value in claim_in.dict(exclude_unset=True).items():
+        setattr(claim, field, value)
+    await db.commit()
+    await db.refresh(claim)
+    return claim
+
+
+async def legacy_delete_claim(db, claim_id, user_id):
+    """SELECT, then DELETE + COMMIT."""
+    claim = await get_claim(db, claim_id, user_id)
+    if not claim:
+        return False
+    await db.delete(claim)
+    await db.commit()
+    return True
+
+
+IMPLEMENTATIONS = {
+    "legacy": (legacy_create_claim, legacy_update_claim, legacy_delete_claim),
+    "returning": (create_claim, update_claim, delete_claim),
+}
+
+
+def sample_claim():
+    return ClaimCreate(
+        patient_id="PAT-BENCH",
+        provider_id="PRV-BENCH",
+        service_date=date.today(),
+        procedures=[Procedure(code="99213", amount=125.5, description="Office visit")],
+        total_amount=125.5,
+    )
+
+
+async def create_schema():
+    """Create the tables and current claim partitions, as app startup does."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await ensure_claim_columns(conn)
+        if await is_partitioned(conn):
+            await ensure_partitions(conn, settings.CLAIM_PARTITION_MONTHS_AHEAD)
+
+
+async def run_implementation(name, user_id, iterations):
+    """Time create, update and delete for one implementation."""
+    create, update, delete = IMPLEMENTATIONS[name]
+    claim_in = sample_claim()
+    claim_update = ClaimUpdate(notes="updated by benchmark")
+    timings = {"create": [], "update": [], "delete": []}
+
+    for _ in range(iterations):
+        async with async_session() as db:
+            started = time.perf_counter()
+            claim = await create(db, claim_in, user_id)
+            timings["create"].append(time.perf_counter() - started)
+            claim_id = claim.id
+
+        async with async_session() as db:
+            started = time.perf_counter()
+            await update(db, claim_id, claim_update, user_id)
+            timings["update"].append(time.perf_counter() - started)
+
+        async with async_session() as db:
+            started = time.perf_counter()
+            await delete(db, claim_id, user_id)
+            timings["delete"].append(time.perf_counter() - started)
+
+    return {
+        f"{name}_{operation}": summarize(samples)
+        for operation, samples in timings.items()
+    }
+
+
+async def main_async(iterations):
+    await create_schema()
+
+    async with async_session() as db:
+        user = User(
+            username=f"bench-{uuid.uuid4().hex[:12]}",
+            full_name="Benchmark User",
+            password_hash="not-a-real-hash",
+        )
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    try:
+        # Warm up the pool and statement caches for both variants.
+        for name in IMPLEMENTATIONS:
+            await run_implementation(name, user_id, min(20, iterations))
+        results = {}
+        for name in IMPLEMENTATIONS:
+            results.update(await run_implementation(name, user_id, iterations))
+    finally:
+        async with async_session() as db:
+            # Core delete, so ON DELETE CASCADE removes the benchmark claims
+            # instead of the ORM trying to null out claims.user_id.
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark claim write paths")
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=500,
+        help="Create/update/delete cycles per implementation",
+    )
+    parser.add_argument("-o", "--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "meta": run_metadata(suite="claim_writes", iterations=args.iterations),
+        "results": asyncio.run(main_async(args.iterations)),
+    }
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Compare two benchmark reports side by side.
+
+Works with the JSON written by benchmarks.micro, benchmarks.claim_writes and
+benchmarks.load:
+
+    python -m benchmarks.compare baseline.json candidate.json
+    python -m benchmarks.compare baseline.json candidate.json --max-p99-regression 10
+
+With --max-p99-regression the exit status is 1 when any benchmark's p99
+grew by more than that many percent, so the check can gate a release.
+"""
+import argparse
+import json
+import sys
+
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def latency(result):
+    # Load reports nest latencies under "latency"; micro reports don't.
+    return result.get("latency", result)
+
+
+def change(before, after):
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def format_cell(before, after):
+    delta = change(before, after)
+    if delta is None:
+        return f"{before} -> {after}"
+    return f"{before} -> {after} ({delta:+.1f}%)"
+
+
+def compare(baseline, candidate):
+    """Yield (name, metric, before, after) for every shared measurement."""
+    base_results = baseline.get("results", {})
+    candidate_results = candidate.get("results", {})
+    for name in sorted(set(base_results) & set(candidate_results)):
+        before, after = base_results[name], candidate_results[name]
+        for column in COLUMNS:
+            if column in latency(before) and column in latency(after):
+                yield name, column, latency(before)[column], latency(after)[column]
+        if "throughput_rps" in before and "throughput_rps" in after:
+            yield name, "throughput_rps", before["throughput_rps"], after[
+                "throughput_rps"
+            ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--max-p99-regression",
+        type=float,
+        help="Fail if any p99 grew by more than this many percent",
+    )
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(
+        f"baseline:  {baseline['meta'].get('revision')} "
+        f"({baseline['meta'].get('started_at')})"
+    )
+    print(
+        f"candidate: {candidate['meta'].get('revision')} "
+        f"({candidate['meta'].get('started_at')})"
+    )
+
+    rows = list(compare(baseline, candidate))
+    width = max((len(name) for name, *_ in rows), default=10)
+    regressions = []
+    current = None
+    for name, metric, before, after in rows:
+        label = name if name != current else ""
+        current = name
+        print(f"{label:<{width}}  {metric:<15} {format_cell(before, after)}")
+        delta = change(before, after)
+        if (
+            metric == "p99_ms"
+            and args.max_p99_regression is not None
+            and delta is not None
+            and delta > args.max_p99_regression
+        ):
+            regressions.append((name, delta))
+
+    missing = set(baseline.get("results", {})) ^ set(candidate.get("results", {}))
+    if missing:
+        print(f"only in one report: {', '.join(sorted(missing))}")
+
+    for name, delta in regressions:
+        print(f"REGRESSION: {name} p99 {delta:+.1f}%", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
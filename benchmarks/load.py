@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Open-loop load generator for a locally running API.
+
+Start the app against a local Postgres first (e.g. ``docker compose up api
+db``), then:
+
+    python -m benchmarks.load --rate 100 --duration 60 -o load.json
+
+Requests are started on a fixed schedule (``--rate`` per second) whether or
+not earlier ones have finished, and latency is measured from each request's
+scheduled start. A server that falls behind therefore shows up in the
+percentiles instead of silently lowering the offered load.
+
+Each arrival picks one scenario by weight (see ``--mix``):
+
+* register: create a new user
+* login: log in as one of the pool users
+* submit: POST /claims
+* fetch: GET /claims/{id}
+* status: GET /claims/status/{id}
+* update: PUT /claims/{id}
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import date
+
+import aiohttp
+
+from benchmarks.stats import run_metadata, summarize
+
+SCENARIOS = ("register", "login", "submit", "fetch", "status", "update")
+DEFAULT_MIX = "register=1,login=2,submit=30,fetch=30,status=30,update=7"
+PASSWORD = "benchmark-password"
+
+# Codes and amounts from config/procedure_codes.csv, so submissions also pass
+# when reference validation is enabled with that table.
+PROCEDURES = [
+    ("99213", "Office visit established patient", 125.50),
+    ("85025", "Complete blood count", 32.25),
+    ("80053", "Comprehensive metabolic panel", 48.00),
+    ("93000", "Electrocardiogram", 65.75),
+]
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def claim_body():
+    procedures = random.sample(PROCEDURES, k=random.randint(1, 3))
+    return {
+        # A fresh patient id keeps duplicate detection from flagging claims.
+        "patient_id": f"PAT-{uuid.uuid4().hex[:12]}",
+        "provider_id": f"PRV-{random.randint(1, 50):04d}",
+        "service_date": date.today().isoformat(),
+        "procedures": [
+            {"code": code, "description": description, "amount": amount}
+            for code, description, amount in procedures
+        ],
+        "total_amount": round(sum(amount for _, _, amount in procedures), 2),
+    }
+
+
+class LoadTest:
+    def __init__(self, session, base_url):
+        self.session = session
+        self.api = base_url.rstrip("/") + "/api/v1"
+        self.users = []
+        self.claims = defaultdict(list)
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    async def call(self, name, method, path, scheduled=None, expect=(200,), **kwargs):
+        """Issue one request and record it under the scenario name."""
+        started = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            async with self.session.request(method, self.api + path, **kwargs) as resp:
+                body = await resp.read()
+                status = resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.errors[name] += 1
+            self.statuses[name][type(e).__name__] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        self.statuses[name][str(status)] += 1
+        if status not in expect:
+            self.errors[name] += 1
+            return None
+        return json.loads(body) if body else {}
+
+    async def register(self, scheduled=None, keep=False):
+        username = f"bench-{uuid.uuid4().hex[:16]}"
+        created = await self.call(
+            "register",
+            "POST",
+            "/users",
+            scheduled,
+            expect=(201,),
+            json={"username": username, "full_name": "Load Test", "password": PASSWORD},
+        )
+        if created and keep:
+            return username
+        return None
+
+    async def login(self, username, scheduled=None):
+        token = await self.call(
+            "login",
+            "POST",
+            "/login",
+            scheduled,
+            data={"username": username, "password": PASSWORD},
+        )
+        return {"Authorization": f"Bearer {token['access_token']}"} if token else None
+
+    async def submit(self, user, scheduled=None):
+        claim = await self.call(
+            "submit",
+            "POST",
+            "/claims",
+            scheduled,
+            expect=(201,),
+            json=claim_body(),
+            headers=user["headers"],
+        )
+        if claim:
+            self.claims[user["username"]].append(claim["id"])
+
+    async def setup(self, users, claims_per_user):
+        """Create the user pool and seed each user with a few claims."""
+        for username in await asyncio.gather(
+            *(self.register(keep=True) for _ in range(users))
+        ):
+            if username is None:
+                continue
+            headers = await self.login(username)
+            if headers:
+                self.users.append({"username": username, "headers": headers})
+        if not self.users:
+            raise SystemExit("Could not register any benchmark users; is the API up?")
+        await asyncio.gather(
+            *(self.submit(user) for user in self.users for _ in range(claims_per_user))
+        )
+
+    async def run_scenario(self, name, scheduled):
+        user = random.choice(self.users)
+        claim_ids = self.claims[user["username"]]
+        if name in ("fetch", "status", "update") and not claim_ids:
+            name = "submit"
+
+        if name == "register":
+            await self.register(scheduled)
+        elif name == "login":
+            await self.login(user["username"], scheduled)
+        elif name == "submit":
+            await self.submit(user, scheduled)
+        elif name == "fetch":
+            await self.call(
+                "fetch",
+                "GET",
+                f"/claims/{random.choice(claim_ids)}",
+                scheduled,
+                headers=user["headers"],
+            )
+        elif name == "status":
+            await self.call(
+                "status",
+                "GET",
+                f"/claims/status/{random.choice(claim_ids)}",
+                scheduled,
+                headers=user["headers"],
+            )
+        elif name == "update":
+            await self.call(
+                "update",
+                "PUT",
+                f"/claims/{random.choice(claim_ids)}",
+                scheduled,
+                json={"notes": f"load test {uuid.uuid4().hex[:8]}"},
+                headers=user["headers"],
+            )
+
+    async def drive(self, rate, duration, weights, max_in_flight):
+        """Start scenarios on a fixed schedule for the given duration."""
+        names, cumulative = list(weights), list(weights.values())
+        in_flight = set()
+        skipped = 0
+        start = time.perf_counter()
+        total = int(rate * duration)
+
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                # The client itself is saturated; count it rather than let
+                # the generator quietly fall behind schedule.
+                skipped += 1
+                continue
+            name = random.choices(names, weights=cumulative)[0]
+            task = asyncio.create_task(self.run_scenario(name, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        return time.perf_counter() - start, skipped
+
+    def reset(self):
+        self.latencies.clear()
+        self.statuses.clear()
+        self.errors.clear()
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            samples = self.latencies[name]
+            endpoints[name] = {
+                "requests": sum(self.statuses[name].values()),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "status_codes": dict(self.statuses[name]),
+                "latency": summarize(samples),
+            }
+        everything = [s for samples in self.latencies.values() for s in samples]
+        return endpoints, {
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(len(everything) / elapsed, 2),
+            "latency": summarize(everything),
+        }
+
+
+async def main_async(args):
+    weights = parse_mix(args.mix)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.max_in_flight)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        load = LoadTest(session, args.base_url)
+        await load.setup(args.users, args.claims_per_user)
+        if args.warmup:
+            await load.drive(args.rate, args.warmup, weights, args.max_in_flight)
+        # Neither the setup requests nor the warmup are part of the report.
+        load.reset()
+
+        elapsed, skipped = await load.drive(
+            args.rate, args.duration, weights, args.max_in_flight
+        )
+
+    endpoints, overall = load.report(elapsed)
+    overall["skipped"] = skipped
+    return {
+        "meta": run_metadata(
+            suite="load",
+            base_url=args.base_url,
+            rate=args.rate,
+            duration=args.duration,
+            warmup=args.warmup,
+            users=args.users,
+            mix=weights,
+            max_in_flight=args.max_in_flight,
+        ),
+        "overall": overall,
+        "results": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--rate", type=float, default=50, help="Scenarios started per second"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="Measured seconds of load"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=10, help="Unmeasured seconds before that"
+    )
+    parser.add_argument("--users", type=int, default=20, help="Pool of logged-in users")
+    parser.add_argument(
+        "--claims-per-user", type=int, default=5, help="Claims seeded per user"
+    )
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help="Scenario weights, e.g. submit=1,fetch=3"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=500,
+        help="Requests allowed in flight before arrivals are skipped",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30, help="Per-request timeout in seconds"
+    )
+    parser.add_argument("-o", "--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+
+
+if __name__ == "__main__":
+    main()
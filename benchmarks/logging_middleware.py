@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Compare per-request overhead of the old and new request logging middleware.
+
+Run from the repository root:
+
+    python -m benchmarks.logging_middleware -n 20000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+import structlog
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.monitoring.logging import LoggingMiddleware, get_logger
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark replaced."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.logger = get_logger("api")
+
+    async def dispatch(self, request, call_next):
+        request_id = str(uuid.uuid4())
+
+        self.logger.info(
+            "request_started",
+            request_id=request_id,
+            method=request.method,
+            path=request.url.path,
+            client_ip=request.client.host,
+        )
+
+        try:
+            response = await call_next(request)
+
+            self.logger.info(
+                "request_completed",
+                request_id=request_id,
+                status_code=response.status_code,
+            )
+
+            return response
+        except Exception as e:
+            self.logger.error(
+                "request_failed",
+                request_id=request_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            raise
+
+
+async def ok(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware=None):
+    """Build a one-route app, optionally wrapped in the given middleware."""
+    return Starlette(
+        routes=[Route("/claims/{claim_id}", ok)],
+        middleware=[Middleware(middleware)] if middleware else None,
+    )
+
+
+def configure_logging():
+    """Render JSON like the app does, but write to /dev/null."""
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.JSONRenderer(),
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root_logger = logging.getLogger()
+    root_logger.handlers = [handler]
+    root_logger.setLevel(logging.INFO)
+
+
+async def run_requests(app, num_requests):
+    """Drive the ASGI app directly and return seconds per request."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/claims/{uuid.uuid4()}",
+        "raw_path": b"",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+    async def request_once():
+        body_sent = False
+        response_done = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a live connection: the client only goes away once the
+            # response has been fully sent.
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response_done.set()
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(min(500, num_requests)):
+        await request_once()
+
+    started = time.perf_counter()
+    for _ in range(num_requests):
+        await request_once()
+    return (time.perf_counter() - started) / num_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logging middleware")
+    parser.add_argument(
+        "-n",
+        "--num-requests",
+        type=int,
+        default=20000,
+        help="Number of requests per variant",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+
+    variants = {
+        "no_middleware": build_app(),
+        "base_http_middleware": build_app(LegacyLoggingMiddleware),
+        "asgi_middleware": build_app(LoggingMiddleware),
+    }
+
+    results = {}
+    for name, app in variants.items():
+        results[name] = asyncio.run(run_requests(app, args.num_requests)) * 1e6
+
+    baseline = results["no_middleware"]
+    report = {
+        name: {
+            "us_per_request": round(value, 2),
+            "overhead_us": round(value - baseline, 2),
+        }
+        for name, value in results.items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the API's hot functions.
+
+Each benchmark calls one function in a tight loop and reports per-call
+latency percentiles:
+
+* auth_decode: get_current_user with a cold token cache (JWT decode)
+* auth_cached: get_current_user with the token and user caches warm
+* claim_serialize_model: ClaimInDB validation + JSON dump
+* claim_serialize_trusted: dump_claim + the orjson response
+* create_claim: the claim INSERT ... RETURNING path (needs Postgres, --with-db)
+
+Run from the repository root:
+
+    python -m benchmarks.micro -n 20000 -o micro.json
+    python -m benchmarks.micro --with-db --only create_claim
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import delete
+from starlette.requests import Request
+
+from app.core.auth_cache import clear_auth_cache, user_cache
+from app.core.deps import get_current_user
+from app.core.responses import APIJSONResponse
+from app.core.security import create_access_token
+from app.models.user import User
+from app.schemas.claim import ClaimInDB, dump_claim
+from benchmarks.claim_serialization import make_claims
+from benchmarks.stats import run_metadata, summarize
+
+
+def auth_request():
+    return Request({"type": "http", "headers": [], "state": {}})
+
+
+async def bench_auth(iterations, cached):
+    """Time get_current_user, clearing the token cache first unless cached."""
+    user = User(id=uuid.uuid4(), username="bench", full_name="Bench User")
+    token = create_access_token(str(user.id))
+    samples = []
+    for _ in range(iterations):
+        if not cached:
+            clear_auth_cache()
+        # The user lookup is a database hit on a miss; keep it warm so only
+        # token handling is measured.
+        user_cache.set(str(user.id), user)
+        started = time.perf_counter()
+        await get_current_user(auth_request(), token)
+        samples.append(time.perf_counter() - started)
+    clear_auth_cache()
+    return samples
+
+
+async def bench_serialize(iterations, trusted):
+    """Time rendering one claim response body."""
+    claims = make_claims(1000)
+    samples = []
+    for i in range(iterations):
+        claim = claims[i % len(claims)]
+        started = time.perf_counter()
+        if trusted:
+            APIJSONResponse(dump_claim(claim))
+        else:
+            ClaimInDB.model_validate(claim).model_dump_json()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_create_claim(iterations):
+    """Time create_claim against the configured Postgres."""
+    from app.db.base import async_session, engine
+    from app.services.claim import create_claim
+    from benchmarks.claim_writes import create_schema, sample_claim
+
+    await create_schema()
+
+    async with async_session() as db:
+        user = User(
+            username=f"bench-{uuid.uuid4().hex[:12]}",
+            full_name="Benchmark User",
+            password_hash="not-a-real-hash",
+        )
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    claim_in = sample_claim()
+    samples = []
+    try:
+        for i in range(iterations):
+            # A distinct patient per claim keeps duplicate detection out of
+            # the measurement.
+            claim = claim_in.model_copy(update={"patient_id": f"PAT-{i:08d}"})
+            async with async_session() as db:
+                started = time.perf_counter()
+                await create_claim(db, claim, user_id)
+                samples.append(time.perf_counter() - started)
+    finally:
+        async with async_session() as db:
+            # Core delete, so ON DELETE CASCADE removes the benchmark claims
+            # instead of the ORM trying to null out claims.user_id.
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+    return samples
+
+
+BENCHMARKS = {
+    "auth_decode": lambda n: bench_auth(n, cached=False),
+    "auth_cached": lambda n: bench_auth(n, cached=True),
+    "claim_serialize_model": lambda n: bench_serialize(n, trusted=False),
+    "claim_serialize_trusted": lambda n: bench_serialize(n, trusted=True),
+    "create_claim": bench_create_claim,
+}
+DATABASE_BENCHMARKS = {"create_claim"}
+
+
+async def main_async(names, iterations, db_iterations):
+    results = {}
+    for name in names:
+        count = db_iterations if name in DATABASE_BENCHMARKS else iterations
+        # One short untimed pass first so imports and caches are warm.
+        await BENCHMARKS[name](min(100, count))
+        results[name] = summarize(await BENCHMARKS[name](count))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark hot API functions")
+    parser.add_argument(
+        "-n", "--iterations", type=int, default=20000, help="Calls per benchmark"
+    )
+    parser.add_argument(
+        "--db-iterations",
+        type=int,
+        default=1000,
+        help="Calls per benchmark that needs Postgres",
+    )
+    parser.add_argument(
+        "--with-db",
+        action="store_true",
+        help="Also run benchmarks that need the configured Postgres",
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run"
+    )
+    parser.add_argument("-o", "--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    names = args.only or [
+        name for name in BENCHMARKS if args.with_db or name not in DATABASE_BENCHMARKS
+    ]
+    report = {
+        "meta": run_metadata(
+            suite="micro",
+            iterations=args.iterations,
+            db_iterations=args.db_iterations,
+        ),
+        "results": asyncio.run(main_async(names, args.iterations, args.db_iterations)),
+    }
+
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Compare the single-process uvicorn setup against the app.serve launcher.
+
+Each variant is started as a subprocess, driven with a closed loop of
+``--concurrency`` keep-alive clients for ``--duration`` seconds, and then
+stopped with SIGTERM:
+
+* uvicorn: ``uvicorn APP`` with the asyncio loop and h11 parser, i.e. the
+  old Dockerfile command in an image without uvloop/httptools
+* serve_1: ``python -m app.serve`` with one worker (uvloop/httptools only)
+* serve: ``python -m app.serve`` with ``--workers`` workers
+
+The default target is the real app, which needs the Postgres from
+``POSTGRES_*``. ``--app benchmarks.server:standalone_app`` runs the same
+middleware, logging and response class over a route that needs no database:
+
+    python -m benchmarks.server --app benchmarks.server:standalone_app -o server.json
+
+The client runs in this process, so leave it spare cores (or pin the
+server with taskset); otherwise the client becomes the bottleneck.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import aiohttp
+from fastapi import FastAPI
+
+from app.core.responses import APIJSONResponse
+from app.monitoring.logging import LoggingMiddleware, setup_logging, shutdown_logging
+from app.monitoring.metrics import setup_metrics
+from app.schemas.claim import dump_claim
+from benchmarks.claim_serialization import make_claims
+from benchmarks.stats import run_metadata, summarize
+
+CLAIM = dump_claim(make_claims(1)[0])
+
+standalone_app = FastAPI(
+    default_response_class=APIJSONResponse,
+    on_startup=[setup_logging],
+    on_shutdown=[shutdown_logging],
+)
+standalone_app.add_middleware(LoggingMiddleware)
+setup_metrics(standalone_app)
+
+
+@standalone_app.get("/health")
+async def health():
+    return {"status": "healthy"}
+
+
+@standalone_app.get("/claims/{claim_id}")
+async def fetch_claim(claim_id: uuid.UUID):
+    return APIJSONResponse(CLAIM)
+
+
+def server_commands(app, port, workers, max_requests):
+    """Command line for each variant, keyed by report name."""
+    serve = [sys.executable, "-m", "app.serve", "--app", app]
+    serve += ["--host", "127.0.0.1", "--port", str(port)]
+    serve += ["--max-requests", str(max_requests)]
+    return {
+        "uvicorn": [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app,
+            "--port",
+            str(port),
+            "--loop",
+            "asyncio",
+            "--http",
+            "h11",
+        ],
+        "serve_1": serve + ["--workers", "1", "--metrics-port", "0"],
+        "serve": serve + ["--workers", str(workers), "--metrics-port", "0"],
+    }
+
+
+async def wait_ready(session, process, url, timeout):
+    """Poll until the server answers, or raise after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not come up at {url}")
+
+
+async def drive(session, url, concurrency, duration):
+    """Closed loop: each client sends its next request when the last returns."""
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+async def run_variant(command, args, env):
+    """Start one server, load it, stop it, and return its results."""
+    base_url = f"http://127.0.0.1:{args.port}"
+    url = base_url + args.path.format(id=uuid.uuid4())
+    process = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_ready(
+                session, process, base_url + "/health", args.startup_timeout
+            )
+            if args.warmup:
+                await drive(session, url, args.concurrency, args.warmup)
+            latencies, errors, elapsed = await drive(
+                session, url, args.concurrency, args.duration
+            )
+    finally:
+        stopping = time.monotonic()
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(args.startup_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    return {
+        "latency": summarize(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "shutdown_s": round(time.monotonic() - stopping, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark server launch modes")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app import path")
+    parser.add_argument(
+        "--path", default="/health", help="Request path; {id} becomes a UUID"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Workers for the multi-worker variant",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=0,
+        help="Worker recycling for the app.serve variants (0: off, since a "
+        "recycled worker drops its keep-alive connections mid-run)",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    parser.add_argument(
+        "--only", action="append", help="Run only these variants (repeatable)"
+    )
+    parser.add_argument("-o", "--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    commands = server_commands(args.app, args.port, args.workers, args.max_requests)
+    if args.only:
+        commands = {name: commands[name] for name in args.only}
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            LOG_FILE_PATH=os.path.join(scratch, "api.log"),
+            METRICS_PORT="0",
+        )
+        results = {
+            name: asyncio.run(run_variant(command, args, env))
+            for name, command in commands.items()
+        }
+
+    report = {
+        "meta": run_metadata(
+            suite="server",
+            app=args.app,
+            path=args.path,
+            workers=args.workers,
+            max_requests=args.max_requests,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+        ),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
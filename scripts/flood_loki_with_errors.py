@@ -1,144 +1,184 @@
 #!/usr/bin/env python3
+"""High-rate asyncio load generator for Loki.
+
+Pushes fake API error logs at a target lines-per-second rate, paced by a
+token bucket, with several pushes in flight at once, and reports achieved
+throughput, push latency and rejections as JSON.
+
+    ./flood_loki_with_errors.py -r 5000 -d 120 -t 5xx
+    ./flood_loki_with_errors.py -u http://localhost:3101/loki/api/v1/push  # stub_loki.py
+"""
 import argparse
+import asyncio
+import gzip
 import json
-import random
 import time
-from datetime import datetime
+from collections import Counter, defaultdict
 
-import requests
+import aiohttp
+from loadgen import TokenBucket, generate_log_entry, log_line, summarize
 
 # Loki push API endpoint
 LOKI_URL = "http://localhost:3100/loki/api/v1/push"
 
-# List of API endpoints to simulate
-ENDPOINTS = [
-    "/api/users",
-    "/api/products",
-    "/api/orders",
-    "/api/payments",
-    "/api/auth/login",
-    "/api/auth/logout",
-    "/api/search",
-    "/api/settings",
-    "/api/notifications",
-    "/api/metrics",
-]
-
-# List of HTTP methods
-METHODS = ["GET", "POST", "PUT", "DELETE"]
-
-# Status code distributions
-ERROR_STATUS_CODES = {
-    "4xx": [400, 401, 403, 404, 429],  # Client errors
-    "5xx": [500, 501, 502, 503, 504],  # Server errors
-}
-
-
-def generate_log_entry(error_type="5xx"):
-    """Generate a fake log entry with error status code"""
-    method = random.choice(METHODS)
-    path = random.choice(ENDPOINTS)
-    request_id = f"req-{random.randint(100000, 999999)}"
-
-    if error_type == "4xx":
-        status = random.choice(ERROR_STATUS_CODES["4xx"])
-        level = "warning"
-    elif error_type == "5xx":
-        status = random.choice(ERROR_STATUS_CODES["5xx"])
-        level = "error"
-    else:
-        status = random.choice(ERROR_STATUS_CODES["4xx"] + ERROR_STATUS_CODES["5xx"])
-        level = "error" if status >= 500 else "warning"
-
-    response_time = random.randint(50, 2000)
-
-    # Create the log entry in JSON format that mimics the application logs
-    timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-    log_data = {
-        "request_id": request_id,
-        "method": method,
-        "path": path,
-        "status_code": status,
-        "response_time_ms": response_time,
-        "logger": "api",
-        "level": level,
-        "timestamp": timestamp,
-        "event": "request_completed",
-    }
-
-    log_line = json.dumps(log_data)
-
-    return {
-        "log_line": log_line,
-        "timestamp": int(time.time() * 1e9),  # Nanosecond timestamp for Loki
-        "level": level,
-        "status": status,
-    }
-
-
-def send_to_loki(log_entries, loki_url=LOKI_URL):
-    """Send log entries to Loki"""
-    # Group entries by level for proper labels
-    entries_by_level = {}
-    for entry in log_entries:
-        level = entry["level"]
-        if level not in entries_by_level:
-            entries_by_level[level] = []
-        entries_by_level[level].append(entry)
-
-    streams = []
-    for level, entries in entries_by_level.items():
-        streams.append(
-            {
-                "stream": {
-                    "job": "api",
-                    "level": level,
-                    "filename": "/var/log/api/api.log",
-                },
-                "values": [
-                    [str(entry["timestamp"]), entry["log_line"]] for entry in entries
-                ],
-            }
-        )
-
-    payload = {"streams": streams}
 
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        response = requests.post(loki_url, headers=headers, data=json.dumps(payload))
-        if response.status_code >= 400:
-            print(
-                f"Error sending logs to Loki: {response.status_code} - {response.text}"
-            )
-        return response.status_code < 400
-    except Exception as e:
-        print(f"Exception while sending logs to Loki: {e}")
-        return False
+def build_payload(entries, cardinality, path_label, offset):
+    """Group entries into Loki streams by their labels"""
+    streams = defaultdict(list)
+    now = time.time_ns()
+    for i, entry in enumerate(entries):
+        # job/level/filename are what the alert rules and dashboards select
+        # on; instance (and optionally path) only add cardinality.
+        labels = (
+            ("job", "api"),
+            ("level", entry["level"]),
+            ("filename", "/var/log/api/api.log"),
+            ("instance", f"loadgen-{(offset + i) % cardinality}"),
+        )
+        if path_label:
+            labels += (("path", entry["path"]),)
+        # Strictly increasing per push, so no two lines share a timestamp.
+        streams[labels].append([str(now + i), log_line(entry)])
+
+    return json.dumps(
+        {
+            "streams": [
+                {"stream": dict(labels), "values": values}
+                for labels, values in streams.items()
+            ]
+        }
+    ).encode()
+
+
+class LokiFlood:
+    def __init__(self, session, args):
+        self.session = session
+        self.args = args
+        self.lines_sent = 0
+        self.lines_accepted = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.latencies = []
+        self.statuses = Counter()
+
+    async def push(self, entries, offset):
+        """Send one batch and record the outcome"""
+        body = build_payload(
+            entries, self.args.cardinality, self.args.path_label, offset
+        )
+        headers = {"Content-Type": "application/json"}
+        self.bytes_raw += len(body)
+        if self.args.gzip:
+            # zlib releases the GIL, so compression overlaps with other pushes.
+            body = await asyncio.to_thread(gzip.compress, body, self.args.gzip_level)
+            headers["Content-Encoding"] = "gzip"
+        self.bytes_sent += len(body)
+        self.lines_sent += len(entries)
+
+        started = time.perf_counter()
+        try:
+            async with self.session.post(
+                self.args.loki_url, data=body, headers=headers
+            ) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.statuses[type(e).__name__] += 1
+            return
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[str(status)] += 1
+        if status < 400:
+            self.lines_accepted += len(entries)
+
+    async def run(self):
+        """Produce batches at the target rate until the line budget or time runs out"""
+        args = self.args
+        bucket = TokenBucket(args.rate, args.batch_size)
+        in_flight = asyncio.Semaphore(args.concurrency)
+        tasks = set()
+        deadline = time.monotonic() + args.duration
+        produced = 0
+
+        async def send(entries, offset):
+            try:
+                await self.push(entries, offset)
+            finally:
+                in_flight.release()
+
+        while time.monotonic() < deadline and (
+            not args.num_entries or produced < args.num_entries
+        ):
+            size = args.batch_size
+            if args.num_entries:
+                size = min(size, args.num_entries - produced)
+            await bucket.acquire(size)
+            # When every push slot is busy the producer waits here, and the
+            # shortfall shows up in the achieved rate.
+            await in_flight.acquire()
+            entries = [generate_log_entry(args.error_type) for _ in range(size)]
+            task = asyncio.create_task(send(entries, produced))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            produced += size
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    def report(self, elapsed):
+        rejected = sum(
+            count
+            for status, count in self.statuses.items()
+            if not status.isdigit() or int(status) >= 400
+        )
+        return {
+            "config": {
+                key: value for key, value in vars(self.args).items() if key != "output"
+            },
+            "elapsed_seconds": round(elapsed, 3),
+            "lines_sent": self.lines_sent,
+            "lines_accepted": self.lines_accepted,
+            "achieved_lines_per_second": round(self.lines_accepted / elapsed, 1),
+            "offered_lines_per_second": round(self.lines_sent / elapsed, 1),
+            "pushes": sum(self.statuses.values()),
+            "rejected_pushes": rejected,
+            "status_codes": dict(self.statuses),
+            "bytes_raw": self.bytes_raw,
+            "bytes_sent": self.bytes_sent,
+            "push_latency": summarize(self.latencies),
+        }
+
+
+async def main_async(args):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        flood = LokiFlood(session, args)
+        started = time.perf_counter()
+        await flood.run()
+        return flood.report(time.perf_counter() - started)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate and send error logs to Loki")
+    parser.add_argument("-u", "--loki-url", default=LOKI_URL, help="Loki push API URL")
+    parser.add_argument(
+        "-r", "--rate", type=float, default=1000, help="Target log lines per second"
+    )
+    parser.add_argument(
+        "-d", "--duration", type=float, default=60, help="Seconds to run for"
+    )
     parser.add_argument(
         "-n",
         "--num-entries",
         type=int,
-        default=100,
-        help="Number of log entries to generate",
+        default=0,
+        help="Stop after this many lines (0: run for --duration)",
     )
     parser.add_argument(
-        "-b",
-        "--batch-size",
-        type=int,
-        default=10,
-        help="Batch size for sending logs to Loki",
+        "-b", "--batch-size", type=int, default=500, help="Log lines per push"
     )
     parser.add_argument(
-        "-i",
-        "--interval",
-        type=float,
-        default=0.5,
-        help="Interval between batches in seconds",
+        "-c", "--concurrency", type=int, default=8, help="Pushes in flight at once"
     )
     parser.add_argument(
         "-t",
@@ -147,46 +187,33 @@ def main():
         default="5xx",
         help="Type of errors to generate",
     )
-    parser.add_argument("-u", "--loki-url", default=LOKI_URL, help="Loki push API URL")
-    args = parser.parse_args()
-
-    print(
-        f"Sending {args.num_entries} error logs of type '{args.error_type}' to Loki at {args.loki_url}"
+    parser.add_argument(
+        "--cardinality",
+        type=int,
+        default=1,
+        help="Distinct values of the instance label (streams per level)",
     )
-    print(
-        f"Using batch size of {args.batch_size} with {args.interval}s interval between batches"
+    parser.add_argument(
+        "--path-label",
+        action="store_true",
+        help="Also label streams by request path (10x more streams)",
     )
+    parser.add_argument(
+        "--no-gzip", dest="gzip", action="store_false", help="Send uncompressed"
+    )
+    parser.add_argument("--gzip-level", type=int, default=6, choices=range(1, 10))
+    parser.add_argument(
+        "--timeout", type=float, default=10, help="Per-push timeout in seconds"
+    )
+    parser.add_argument("-o", "--output", help="Also write the JSON report here")
+    args = parser.parse_args()
 
-    batches = args.num_entries // args.batch_size
-    remaining = args.num_entries % args.batch_size
-
-    for i in range(batches):
-        batch_entries = [
-            generate_log_entry(args.error_type) for _ in range(args.batch_size)
-        ]
-        success = send_to_loki(batch_entries, args.loki_url)
-
-        if success:
-            print(f"Sent batch {i + 1}/{batches} ({args.batch_size} logs)")
-        else:
-            print(f"Failed to send batch {i + 1}/{batches}")
-
-        if (
-            i < batches - 1 or remaining > 0
-        ):  # Don't sleep after the last batch if no remaining
-            time.sleep(args.interval)
-
-    # Send remaining entries if any
-    if remaining > 0:
-        batch_entries = [generate_log_entry(args.error_type) for _ in range(remaining)]
-        success = send_to_loki(batch_entries, args.loki_url)
-
-        if success:
-            print(f"Sent final batch ({remaining} logs)")
-        else:
-            print("Failed to send final batch")
-
-    print(f"Completed sending {args.num_entries} error logs to Loki")
+    report = asyncio.run(main_async(args))
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import logging
-import random
 import time
-from datetime import datetime
 
-import requests
+import aiohttp
+from loadgen import TokenBucket, generate_log_entry, summarize
 
 # Configure logging
 logging.basicConfig(
-    format='[%(asctime)s] "%(method)s %(path)s HTTP/1.1" %(status)d %(response_time)d ms',
+    format='[%(asctime)s] "%(method)s %(path)s HTTP/1.1" %(status_code)d %(response_time_ms)d ms',
     datefmt="%Y-%m-%d %H:%M:%S",
     level=logging.INFO,
 )
@@ -17,72 +17,52 @@ logging.basicConfig(
 # Set up custom logger
 logger = logging.getLogger("api-error-generator")
 
-# List of API endpoints to simulate
-ENDPOINTS = [
-    "/api/users",
-    "/api/products",
-    "/api/orders",
-    "/api/payments",
-    "/api/auth/login",
-    "/api/auth/logout",
-    "/api/search",
-    "/api/settings",
-    "/api/notifications",
-    "/api/metrics",
-]
-
-# List of HTTP methods
-METHODS = ["GET", "POST", "PUT", "DELETE"]
-
-# Status code distributions
-ERROR_STATUS_CODES = {
-    "4xx": [400, 401, 403, 404, 429],  # Client errors
-    "5xx": [500, 501, 502, 503, 504],  # Server errors
-}
-
-
-def generate_log_entry(error_type="5xx", method=None):
-    """Generate a fake log entry with error status code"""
-    if method is None:
-        method = random.choice(METHODS)
-
-    path = random.choice(ENDPOINTS)
-
-    if error_type == "4xx":
-        status = random.choice(ERROR_STATUS_CODES["4xx"])
-    elif error_type == "5xx":
-        status = random.choice(ERROR_STATUS_CODES["5xx"])
-    else:
-        status = random.choice(ERROR_STATUS_CODES["4xx"] + ERROR_STATUS_CODES["5xx"])
-
-    response_time = random.randint(50, 2000)
-
-    # Log the entry
-    log_dict = {
-        "method": method,
-        "path": path,
-        "status": status,
-        "response_time": response_time,
-    }
-
-    logger.info("", extra=log_dict)
-
-    return {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "method": method,
-        "path": path,
-        "status": status,
-        "response_time": response_time,
-    }
-
-
-def send_to_api(log_entry, target_url=None):
-    """Send the log entry to a target URL if provided"""
-    if target_url:
-        try:
-            requests.post(target_url, json=log_entry, timeout=1)
-        except requests.RequestException:
-            pass
+
+async def send_to_api(session, log_entry, target_url, latencies, failures):
+    """Send the log entry to the target URL and record how it went"""
+    started = time.perf_counter()
+    try:
+        async with session.post(target_url, json=log_entry) as response:
+            await response.read()
+            if response.status >= 400:
+                failures[str(response.status)] = (
+                    failures.get(str(response.status), 0) + 1
+                )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+        return
+    latencies.append(time.perf_counter() - started)
+
+
+async def generate(args):
+    """Emit entries at the target rate, posting them when a URL is given"""
+    bucket = TokenBucket(args.rate, max(1, int(args.rate / 10)))
+    in_flight = asyncio.Semaphore(args.concurrency)
+    latencies, failures, tasks = [], {}, set()
+
+    timeout = aiohttp.ClientTimeout(total=1)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def send(entry):
+            try:
+                await send_to_api(session, entry, args.target_url, latencies, failures)
+            finally:
+                in_flight.release()
+
+        for _ in range(args.num_entries):
+            await bucket.acquire()
+            entry = generate_log_entry(args.error_type)
+            logger.info("", extra=entry)
+            if args.target_url:
+                await in_flight.acquire()
+                task = asyncio.create_task(send(entry))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    return latencies, failures
 
 
 def main():
@@ -95,11 +75,11 @@ def main():
         help="Number of log entries to generate",
     )
     parser.add_argument(
-        "-i",
-        "--interval",
+        "-r",
+        "--rate",
         type=float,
-        default=0.1,
-        help="Interval between logs in seconds",
+        default=10,
+        help="Log entries per second",
     )
     parser.add_argument(
         "-t",
@@ -109,22 +89,30 @@ def main():
         help="Type of errors to generate",
     )
     parser.add_argument("-u", "--target-url", help="Optional URL to send logs to")
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Requests to the target URL in flight at once",
+    )
     args = parser.parse_args()
 
     print(
-        f"Generating {args.num_entries} error logs of type '{args.error_type}' with {args.interval}s interval"
+        f"Generating {args.num_entries} error logs of type '{args.error_type}' at {args.rate}/s"
     )
 
-    for i in range(args.num_entries):
-        log_entry = generate_log_entry(args.error_type)
+    started = time.perf_counter()
+    latencies, failures = asyncio.run(generate(args))
+    elapsed = time.perf_counter() - started
 
-        if args.target_url:
-            send_to_api(log_entry, args.target_url)
-
-        if i < args.num_entries - 1:  # Don't sleep after the last entry
-            time.sleep(args.interval)
-
-    print(f"Generated {args.num_entries} error logs")
+    print(
+        f"Generated {args.num_entries} error logs in {elapsed:.2f}s "
+        f"({args.num_entries / elapsed:.1f}/s)"
+    )
+    if args.target_url:
+        print(f"Target latency: {summarize(latencies)}")
+        print(f"Failures: {failures or 'none'}")
 
 
 if __name__ == "__main__":
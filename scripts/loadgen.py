@@ -0,0 +1,99 @@
+"""Shared pieces of the asyncio log load generators in this directory."""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+# List of API endpoints to simulate
+ENDPOINTS = [
+    "/api/users",
+    "/api/products",
+    "/api/orders",
+    "/api/payments",
+    "/api/auth/login",
+    "/api/auth/logout",
+    "/api/search",
+    "/api/settings",
+    "/api/notifications",
+    "/api/metrics",
+]
+
+# List of HTTP methods
+METHODS = ["GET", "POST", "PUT", "DELETE"]
+
+# Status code distributions
+ERROR_STATUS_CODES = {
+    "4xx": [400, 401, 403, 404, 429],  # Client errors
+    "5xx": [500, 501, 502, 503, 504],  # Server errors
+}
+
+
+def generate_log_entry(error_type="5xx"):
+    """Generate a fake request_completed log entry with an error status code"""
+    if error_type == "both":
+        status = random.choice(ERROR_STATUS_CODES["4xx"] + ERROR_STATUS_CODES["5xx"])
+    else:
+        status = random.choice(ERROR_STATUS_CODES[error_type])
+
+    return {
+        "request_id": f"req-{random.randint(100000, 999999)}",
+        "method": random.choice(METHODS),
+        "path": random.choice(ENDPOINTS),
+        "status_code": status,
+        "response_time_ms": random.randint(50, 2000),
+        "logger": "api",
+        "level": "error" if status >= 500 else "warning",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+        "event": "request_completed",
+    }
+
+
+def log_line(entry):
+    """Render an entry the way the application's JSON renderer does"""
+    return json.dumps(entry, separators=(",", ":"))
+
+
+class TokenBucket:
+    """Paces producers to `rate` tokens per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, tokens=1):
+        # Requests larger than the bucket are allowed to drain it fully and
+        # wait for the remainder, so big batches still average out to `rate`.
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= min(tokens, self.capacity):
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((min(tokens, self.capacity) - self.tokens) / self.rate)
+
+
+def summarize(samples):
+    """p50/p95/p99/max of latencies given in seconds, as milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def pick(fraction):
+        return ordered[
+            max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+        ]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Minimal stand-in for Loki's push API, for testing the load generators.
+
+Accepts JSON pushes (optionally gzip-encoded) on /loki/api/v1/push and
+counts what arrives. Limits can be set to reproduce Loki's ingestion
+rejections:
+
+    ./stub_loki.py --port 3101 --max-lines-per-second 20000 --max-streams 100
+"""
+import argparse
+import gzip
+import json
+import time
+
+from aiohttp import web
+
+
+class StubLoki:
+    def __init__(self, args):
+        self.args = args
+        self.window = int(time.monotonic())
+        self.window_lines = 0
+        self.streams = set()
+        self.totals = {"pushes": 0, "lines": 0, "rejected": 0, "bytes": 0}
+        self.started = time.monotonic()
+
+    def reject(self, status, reason):
+        """Count and return a Loki-style error response"""
+        self.totals["rejected"] += 1
+        return web.Response(status=status, text=reason)
+
+    async def push(self, request):
+        # aiohttp already inflates gzip bodies it recognises; the wire size
+        # comes from Content-Length.
+        self.totals["bytes"] += request.content_length or 0
+        body = await request.read()
+        if body[:2] == b"\x1f\x8b":
+            body = gzip.decompress(body)
+        try:
+            streams = json.loads(body)["streams"]
+            lines = sum(len(stream["values"]) for stream in streams)
+        except (ValueError, KeyError, TypeError):
+            return self.reject(400, "malformed push payload")
+
+        labels = {tuple(sorted(stream["stream"].items())) for stream in streams}
+        if self.args.max_streams and len(self.streams | labels) > self.args.max_streams:
+            return self.reject(429, "stream limit exceeded")
+
+        second = int(time.monotonic())
+        if second != self.window:
+            self.window, self.window_lines = second, 0
+        if (
+            self.args.max_lines_per_second
+            and self.window_lines + lines > self.args.max_lines_per_second
+        ):
+            return self.reject(429, "ingestion rate limit exceeded")
+
+        self.window_lines += lines
+        self.streams |= labels
+        self.totals["pushes"] += 1
+        self.totals["lines"] += lines
+        return web.Response(status=204)
+
+    async def stats(self, request):
+        elapsed = time.monotonic() - self.started
+        return web.json_response(
+            {
+                **self.totals,
+                "streams": len(self.streams),
+                "lines_per_second": round(self.totals["lines"] / elapsed, 1),
+            }
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Loki push endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3101)
+    parser.add_argument(
+        "--max-lines-per-second",
+        type=int,
+        default=0,
+        help="Reject pushes with 429 above this rate (0: unlimited)",
+    )
+    parser.add_argument(
+        "--max-streams",
+        type=int,
+        default=0,
+        help="Reject pushes that would exceed this many streams (0: unlimited)",
+    )
+    args = parser.parse_args()
+
+    stub = StubLoki(args)
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.add_routes(
+        [
+            web.post("/loki/api/v1/push", stub.push),
+            web.get("/stats", stub.stats),
+        ]
+    )
+    print(f"Stub Loki listening on http://{args.host}:{args.port}/loki/api/v1/push")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import pytest
+
+from app.core import cache
+from app.core.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=5)
+    ttl_cache.set("a", 1)
+
+    clock[0] += 4.9
+    assert ttl_cache.get("a") == 1
+
+    clock[0] += 0.1
+    assert ttl_cache.get("a", "missing") == "missing"
+    assert len(ttl_cache) == 0
+
+
+def test_per_entry_ttl_is_capped_by_cache_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=5)
+    ttl_cache.set("short", 1, ttl=1)
+    ttl_cache.set("long", 2, ttl=60)
+
+    clock[0] += 2
+    assert ttl_cache.get("short") is None
+    assert ttl_cache.get("long") == 2
+
+    clock[0] += 3
+    assert ttl_cache.get("long") is None
+
+
+def test_evicts_least_recently_used(clock):
+    ttl_cache = TTLCache(maxsize=2, ttl=5)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("c") == 3
+
+
+@pytest.mark.parametrize("maxsize, ttl", [(0, 5), (10, 0)])
+def test_disabled_cache_stores_nothing(clock, maxsize, ttl):
+    ttl_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    ttl_cache.set("a", 1)
+
+    assert len(ttl_cache) == 0
@@ -0,0 +1,56 @@
+import uuid
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.claim import (
+    claim_fingerprint,
+    decode_claim_cursor,
+    encode_claim_cursor,
+)
+
+
+def test_cursor_round_trip():
+    claim = SimpleNamespace(
+        created_at=datetime(2024, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+        id=uuid.uuid4(),
+    )
+
+    cursor = encode_claim_cursor(claim)
+
+    assert "=" not in cursor
+    assert decode_claim_cursor(cursor) == (claim.created_at, claim.id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "WyJ4IiwgInkiXQ"])
+def test_decode_rejects_malformed_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_claim_cursor(cursor)
+
+
+def test_fingerprint_ignores_code_order_and_whitespace():
+    assert claim_fingerprint(
+        "P1", "D1", date(2024, 3, 1), ["99213", "85025"]
+    ) == claim_fingerprint(" P1", "D1 ", date(2024, 3, 1), ["85025 ", "99213"])
+
+
+def test_fingerprint_accepts_stored_datetime():
+    assert claim_fingerprint(
+        "P1", "D1", datetime(2024, 3, 1, tzinfo=timezone.utc), ["99213"]
+    ) == claim_fingerprint("P1", "D1", date(2024, 3, 1), ["99213"])
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        ("P2", "D1", date(2024, 3, 1), ["99213"]),
+        ("P1", "D2", date(2024, 3, 1), ["99213"]),
+        ("P1", "D1", date(2024, 3, 2), ["99213"]),
+        ("P1", "D1", date(2024, 3, 1), ["99214"]),
+    ],
+)
+def test_fingerprint_changes_with_each_field(changed):
+    original = claim_fingerprint("P1", "D1", date(2024, 3, 1), ["99213"])
+
+    assert claim_fingerprint(*changed) != original
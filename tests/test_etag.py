@@ -0,0 +1,23 @@
+import pytest
+
+from app.api.endpoints.claims import _etag_matches
+
+ETAG = 'W/"abc-1700000000000000"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [
+        ETAG,
+        '"abc-1700000000000000"',
+        '"other", W/"abc-1700000000000000"',
+        "*",
+    ],
+)
+def test_matches(if_none_match):
+    assert _etag_matches(ETAG, if_none_match)
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", 'W/"abc-1700000000000001"'])
+def test_does_not_match(if_none_match):
+    assert not _etag_matches(ETAG, if_none_match)
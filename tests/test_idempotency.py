@@ -0,0 +1,73 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import idempotency
+from app.services.idempotency import IdempotencyKeyMismatch, execute_idempotent
+
+
+class FakeSession:
+    def __init__(self, inserts, records):
+        self.inserts = list(inserts)
+        self.records = list(records)
+        self.rollbacks = 0
+        self.commits = 0
+
+    async def scalar(self, statement):
+        return self.inserts.pop(0)
+
+    async def get(self, model, ident):
+        return self.records.pop(0)
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+    async def execute(self, statement):
+        return None
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    idempotency._response_cache.clear()
+
+
+async def operation(db):
+    return {"created": True}
+
+
+@pytest.mark.asyncio
+async def test_replays_the_stored_response():
+    stored = SimpleNamespace(
+        request_hash="abc", status_code=201, response_body={"created": "earlier"}
+    )
+    db = FakeSession(inserts=[None], records=[stored])
+
+    result = await execute_idempotent(db, uuid.uuid4(), "k", "abc", operation, 201)
+
+    assert result == (201, {"created": "earlier"}, True)
+    assert db.commits == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_a_reused_key_with_a_different_request():
+    stored = SimpleNamespace(request_hash="abc", status_code=201, response_body={})
+    db = FakeSession(inserts=[None], records=[stored])
+
+    with pytest.raises(IdempotencyKeyMismatch):
+        await execute_idempotent(db, uuid.uuid4(), "k", "other", operation, 201)
+
+
+@pytest.mark.asyncio
+async def test_claims_the_key_again_when_cleanup_removed_it():
+    # The INSERT conflicts, but the row is gone by the time it is read.
+    db = FakeSession(inserts=[None, "k"], records=[None])
+
+    result = await execute_idempotent(db, uuid.uuid4(), "k", "abc", operation, 201)
+
+    assert result == (201, {"created": True}, False)
+    assert db.rollbacks == 1
+    assert db.commits == 1
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "scripts"))
+
+import loadgen  # noqa: E402
+from loadgen import TokenBucket  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(loadgen.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(loadgen.asyncio, "sleep", fake.sleep)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_burst_up_to_capacity_without_waiting(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    for _ in range(5):
+        await bucket.acquire()
+
+    assert clock.sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refill_at_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    await bucket.acquire(5)
+
+    await bucket.acquire(2)
+
+    assert clock.now == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_requests_larger_than_capacity_average_out_to_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    await bucket.acquire(5)
+    await bucket.acquire(20)
+    await bucket.acquire(5)
+
+    # 30 tokens at 10/s after an initial burst of 5.
+    assert clock.now == pytest.approx(2.5)
@@ -0,0 +1,163 @@
+import gzip
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.monitoring.logging import LokiHandler
+
+
+class StubLoki(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubLokiRequestHandler)
+        self.statuses = []
+        self.pushes = []
+        self.release = threading.Event()
+        self.release.set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/loki/api/v1/push"
+
+
+class StubLokiRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.pushes.append((dict(self.headers), body))
+        self.server.release.wait(5)
+        status = self.server.statuses.pop(0) if self.server.statuses else 204
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def loki():
+    server = StubLoki()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_handler(loki):
+    handlers = []
+
+    def make(**kwargs):
+        options = {"flush_interval": 60, "backoff": 0.01, "timeout": 2}
+        options.update(kwargs)
+        handler = LokiHandler(host=None, port=None, url=loki.url, **options)
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        handler.close(timeout=2)
+
+
+def record(name="api", level=logging.INFO, msg="hello"):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def dropped(reason):
+    return (
+        REGISTRY.get_sample_value("loki_records_dropped_total", {"reason": reason}) or 0
+    )
+
+
+def decode(push):
+    headers, body = push
+    assert headers["Content-Encoding"] == "gzip"
+    return json.loads(gzip.decompress(body))
+
+
+def test_groups_records_into_one_stream_per_label_set(loki, make_handler):
+    handler = make_handler()
+    handler.emit(record("api", msg="one"))
+    handler.emit(record("worker", msg="two"))
+    handler.emit(record("api", msg="three"))
+    handler.emit(record("api", logging.ERROR, msg="four"))
+    handler.flush(timeout=2)
+
+    assert len(loki.pushes) == 1
+    streams = {
+        (stream["stream"]["logger"], stream["stream"]["level"]): [
+            line for _, line in stream["values"]
+        ]
+        for stream in decode(loki.pushes[0])["streams"]
+    }
+    assert streams == {
+        ("api", "info"): ["one", "three"],
+        ("worker", "info"): ["two"],
+        ("api", "error"): ["four"],
+    }
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retries_server_errors_and_throttling(loki, make_handler, status):
+    loki.statuses = [status, status]
+    handler = make_handler(max_retries=3)
+    handler.emit(record())
+    handler.flush(timeout=2)
+
+    assert len(loki.pushes) == 3
+    assert loki.pushes[0][1] == loki.pushes[2][1]
+    assert handler.dropped == 0
+
+
+def test_drops_rejected_batches_without_retrying(loki, make_handler):
+    before = dropped("rejected")
+    loki.statuses = [400]
+    handler = make_handler(max_retries=3)
+    handler.emit(record())
+    handler.emit(record())
+    handler.flush(timeout=2)
+
+    assert len(loki.pushes) == 1
+    assert handler.dropped == 2
+    assert dropped("rejected") - before == 2
+
+
+def test_counts_queue_full_drops(loki, make_handler):
+    before = dropped("queue_full")
+    loki.release.clear()
+    handler = make_handler(batch_size=1, queue_size=1)
+    handler.emit(record(msg="sending"))
+    while not loki.pushes:
+        threading.Event().wait(0.01)
+
+    # The shipper is stuck on the first push, so the queue fills up.
+    handler.emit(record(msg="queued"))
+    handler.emit(record(msg="dropped"))
+    loki.release.set()
+    handler.flush(timeout=2)
+
+    assert handler.dropped == 1
+    assert dropped("queue_full") - before == 1
+    streams = [stream for push in loki.pushes for stream in decode(push)["streams"]]
+    assert [line for stream in streams for _, line in stream["values"]] == [
+        "sending",
+        "queued",
+    ]
+
+
+def test_close_flushes_the_pending_batch(loki, make_handler):
+    handler = make_handler(batch_size=100)
+    handler.emit(record(msg="one"))
+    handler.emit(record(msg="two"))
+    assert loki.pushes == []
+
+    handler.close(timeout=2)
+
+    assert len(loki.pushes) == 1
+    (stream,) = decode(loki.pushes[0])["streams"]
+    assert [line for _, line in stream["values"]] == ["one", "two"]
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+
+from app.schemas.claim import ClaimCreate
+from app.services import procedure_codes
+from app.services.procedure_codes import ProcedureCodeIndex, validate_claims
+
+
+@pytest.fixture
+def codes(monkeypatch):
+    index = ProcedureCodeIndex([("99213", "50.00", "150.00"), ("85025", "10", "40")])
+    monkeypatch.setattr(procedure_codes, "_index", index)
+    return index
+
+
+def make_claim(procedures, total_amount):
+    return ClaimCreate(
+        patient_id="P1",
+        provider_id="D1",
+        service_date=date(2024, 3, 1),
+        procedures=[
+            {"code": code, "amount": amount, "description": "Visit"}
+            for code, amount in procedures
+        ],
+        total_amount=total_amount,
+    )
+
+
+def test_valid_claim_passes(codes):
+    claim = make_claim([("99213", 100.10), ("85025", 20.20)], 120.30)
+
+    assert validate_claims([claim]) == [None]
+
+
+def test_reports_errors_per_claim(codes):
+    claims = [
+        make_claim([("99213", 100)], 100),
+        make_claim([("00000", 100)], 100),
+        make_claim([("85025", 41)], 41),
+        make_claim([("99213", 100)], 90),
+    ]
+
+    results = validate_claims(claims)
+
+    assert results[0] is None
+    assert results[1] == "procedures.0.code: Unknown procedure code '00000'"
+    assert results[2] == (
+        "procedures.0.amount: Amount for '85025' must be between 10.00 and 40.00"
+    )
+    assert results[3] == (
+        "total_amount: Must equal the sum of procedure amounts (100.00)"
+    )
+
+
+def test_without_reference_table_only_totals_are_checked(monkeypatch):
+    monkeypatch.setattr(procedure_codes, "_index", None)
+
+    results = validate_claims(
+        [make_claim([("00000", 5)], 5), make_claim([("00000", 5)], 6)]
+    )
+
+    assert results[0] is None
+    assert results[1].startswith("total_amount:")
+
+
+def test_index_rejects_duplicate_codes():
+    with pytest.raises(ValueError, match="Duplicate"):
+        ProcedureCodeIndex([("99213", 1, 2), ("99213", 1, 2)])
+
+
+@pytest.mark.parametrize("contents", [None, "code,min_amount,max_amount\nA,5,1\n"])
+def test_unloadable_table_disables_code_validation(tmp_path, monkeypatch, contents):
+    monkeypatch.setattr(procedure_codes, "_index", None)
+    path = tmp_path / "procedure_codes.csv"
+    if contents is not None:
+        path.write_text(contents)
+
+    procedure_codes.load_procedure_codes(str(path))
+
+    assert procedure_codes.get_procedure_index() is None
+    assert validate_claims([make_claim([("00000", 5)], 5)]) == [None]
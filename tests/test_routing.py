@@ -0,0 +1,158 @@
+import uuid
+
+import pytest
+from sqlalchemy import exc
+
+from app.core.cache import TTLCache
+from app.db import routing
+
+
+class FakeSession:
+    def __init__(self, name, fail_query=False):
+        self.name = name
+        self.fail_query = fail_query
+        self.closed = False
+
+    async def connection(self):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def use_replica(monkeypatch, fail_query):
+    sessions = []
+
+    def factory():
+        session = FakeSession("replica-0", fail_query=fail_query)
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(routing, "replica_sessions", [("replica-0", factory)])
+    monkeypatch.setattr(routing, "_unhealthy_until", {})
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=10, ttl=5))
+    monkeypatch.setattr(routing, "async_session", lambda: FakeSession("primary"))
+    return sessions
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    return use_replica(monkeypatch, fail_query=True)
+
+
+@pytest.fixture
+def healthy_replica(monkeypatch):
+    return use_replica(monkeypatch, fail_query=False)
+
+
+async def query(session, value):
+    if session.fail_query:
+        raise exc.OperationalError("SELECT 1", {}, ConnectionResetError())
+    return session.name, value
+
+
+@pytest.mark.asyncio
+async def test_run_read_retries_on_primary_when_replica_fails(replica):
+    assert await routing.run_read(None, query, 42) == ("primary", 42)
+    assert replica[0].closed
+    assert "replica-0" in routing._unhealthy_until
+
+
+@pytest.mark.asyncio
+async def test_read_session_raises_when_replica_fails_after_checkout(replica):
+    with pytest.raises(exc.OperationalError):
+        async with routing.read_session() as session:
+            await query(session, 42)
+    assert "replica-0" in routing._unhealthy_until
+
+
+@pytest.mark.asyncio
+async def test_recent_writer_is_pinned_to_primary(healthy_replica):
+    writer, reader = uuid.uuid4(), uuid.uuid4()
+    routing.mark_user_write(writer)
+
+    assert await routing.run_read(writer, query, 1) == ("primary", 1)
+    assert await routing.run_read(reader, query, 1) == ("replica-0", 1)
+    async with routing.read_session(writer) as session:
+        assert session.name == "primary"
+
+
+@pytest.mark.asyncio
+async def test_pin_expires(healthy_replica, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(routing.time, "monotonic", lambda: now[0])
+    writer = uuid.uuid4()
+    routing.mark_user_write(writer)
+
+    now[0] += 5
+
+    assert await routing.run_read(writer, query, 1) == ("replica-0", 1)
+
+
+def test_writes_are_not_tracked_without_replicas(monkeypatch):
+    monkeypatch.setattr(routing, "replica_sessions", [])
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=10, ttl=5))
+
+    routing.mark_user_write(uuid.uuid4())
+
+    assert len(routing._recent_writers) == 0
+
+
+async def call(app, cookie=None):
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({"type": "http", "headers": headers}, receive, send)
+    return dict(messages[0]["headers"])
+
+
+def pin_app(user_id, write, reads):
+    async def app(scope, receive, send):
+        if write:
+            routing.mark_user_write(user_id)
+        reads.append(await routing.run_read(user_id, query, 1))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return routing.ReadYourWritesMiddleware(app)
+
+
+@pytest.mark.asyncio
+async def test_pin_cookie_carries_writes_to_other_workers(healthy_replica):
+    user_id, reads = str(uuid.uuid4()), []
+
+    headers = await call(pin_app(user_id, True, reads))
+    cookie = headers[b"set-cookie"].decode().split(";")[0]
+    assert cookie.startswith(routing.READ_PIN_COOKIE + "=")
+
+    # Another worker: no local record of the write, only the cookie.
+    routing._recent_writers.clear()
+    await call(pin_app(user_id, False, reads), cookie)
+    await call(pin_app(user_id, False, reads))
+
+    assert [pool for pool, _ in reads] == ["primary", "primary", "replica-0"]
+
+
+@pytest.mark.asyncio
+async def test_pin_cookie_is_ignored_when_forged_expired_or_foreign(healthy_replica):
+    user_id, other_id, reads = str(uuid.uuid4()), str(uuid.uuid4()), []
+    expired = routing.read_pin_cookie(user_id, now=0)
+    valid = routing.read_pin_cookie(user_id)
+    forged = valid[:-1] + ("1" if valid.endswith("0") else "0")
+
+    for value in (expired, forged, routing.read_pin_cookie(other_id), "junk"):
+        await call(pin_app(user_id, False, reads), f"read_pin={value}")
+
+    assert [pool for pool, _ in reads] == ["replica-0"] * 4